@@ -24,8 +24,7 @@ for protein in proteins:
     # fragment the protein
     fragments = fragment_protein(protein)
     # add fragments to protein object
-    for fragment in fragments:
-        (protein.add_fragment(fragment))
+    protein.add_fragments_bulk(fragments)
 
     # create graphic of domain locations and fragmentation results
     plot_fragmentation_output(protein, fragments, image_save_location, label=['UniProt', 'manually_defined'])
@@ -1,7 +1,7 @@
 from .classes import Protein, Domain, ProteinSubsection
 from .process_proteins_csv import find_user_specified_domains, initialize_proteins_from_csv, update_csv_with_fragments
 from .alphafold_db_domain_identification import read_afdb_json, find_domain_by_res, find_domains_from_pae
-from .uniprot_fetch import fetch_uniprot_info, find_uniprot_domains
+from .uniprot_fetch import fetch_uniprot_info, fetch_uniprot_info_batch, find_uniprot_domains
 from .domain_compilation import compile_domains
 from .fragmentation_methods import check_valid_cutpoint, merge_overlapping_domains, recursive_fragmentation, validate_fragmentation_parameters
 from .long_domains import handle_long_domains
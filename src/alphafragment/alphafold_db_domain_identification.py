@@ -11,13 +11,33 @@ Functions:
 
 Dependencies:
   - requests: Used for making HTTP requests to the AlphaFold Database.
+  - numpy: Used to compare PAE values for many residue pairs at once.
+  - threading: Used to keep one requests session per thread.
+  - itertools.repeat: Used to check the types of PAE values quickly.
   - .classes.Domain: The Domain class used to represent protein domains.
 """
 
 #importing required packages
+import threading
+from itertools import repeat
+import numpy as np
 import requests
 from .classes import Domain
 
+_thread_local = threading.local()
+
+def _afdb_session():
+    """
+    Returns the requests session for the current thread, creating it if needed,
+    so that the connection to the AlphaFold Database is reused between requests
+    rather than opened again for every protein.
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
+
 def read_afdb_json(accession_id, database_version="v4"):
     """
     Fetches and returns the Predicted Aligned Error (PAE) data from the
@@ -59,7 +79,7 @@ def read_afdb_json(accession_id, database_version="v4"):
         f'-predicted_aligned_error_{database_version}.json'
     )
     try:
-        response = requests.get(json_url, timeout=30) #timeout in 30 seconds
+        response = _afdb_session().get(json_url, timeout=30) #timeout in 30 seconds
         # Raise an HTTPError if the status is 4xx, 5xx
         response.raise_for_status()
         data = response.json()
@@ -109,8 +129,8 @@ def find_domains_from_pae(pae,  method='definite', custom_params=None):
     residues.
 
     Parameters:
-      - pae (list of lists): A 2D matrix of PAE values between residue pairs,
-        where pae[i][j] is the PAE between residues i and j.
+      - pae (list of lists or numpy.ndarray): A 2D matrix of PAE values between
+        residue pairs, where pae[i][j] is the PAE between residues i and j.
       - method (str, optional): Strategy for grouping residues into domains. Default is
         definite. Options are:
           - 'cautious' - Groups residues into domains with moderate PAE
@@ -168,19 +188,27 @@ def find_domains_from_pae(pae,  method='definite', custom_params=None):
       - Domain positions are 0-based, so the start and end residues are 1 less
         than the actual residue numbers.
     """
-    # Check if 'pae' is a non-empty matrix, each row is a list, and contains only numeric entries
-    if (not pae or
-        not isinstance(pae, list) or
-        any(
-          not isinstance(row, list) or
-          any(not isinstance(item, (int, float)) for item in row)
-          for row in pae
-          )):
-        raise ValueError("Input 'pae' must be a non-empty matrix of numbers.")
-
-    # Check if 'pae' is a square matrix
-    if any(len(row) != len(pae) for row in pae):
-        raise ValueError("Input 'pae' must be a square matrix.")
+    if isinstance(pae, np.ndarray):
+        # Check if 'pae' is a non-empty numeric matrix
+        if pae.ndim != 2 or pae.size == 0 or pae.dtype.kind not in 'biuf':
+            raise ValueError("Input 'pae' must be a non-empty matrix of numbers.")
+        # Check if 'pae' is a square matrix
+        if pae.shape[0] != pae.shape[1]:
+            raise ValueError("Input 'pae' must be a square matrix.")
+    else:
+        # Check if 'pae' is a non-empty matrix, each row is a list, and contains only numeric entries
+        if (not pae or
+            not isinstance(pae, list) or
+            any(
+              not isinstance(row, list) or
+              not all(map(isinstance, row, repeat((int, float))))
+              for row in pae
+              )):
+            raise ValueError("Input 'pae' must be a non-empty matrix of numbers.")
+
+        # Check if 'pae' is a square matrix
+        if any(len(row) != len(pae) for row in pae):
+            raise ValueError("Input 'pae' must be a square matrix.")
 
     # Default parameters for cautious and definite methods
     parameters = {
@@ -209,39 +237,41 @@ def find_domains_from_pae(pae,  method='definite', custom_params=None):
     else:
         raise ValueError("Invalid method. Choose 'cautious', 'definite', or 'custom'.")
 
+    # Convert the PAE matrix to an array once (arrays are used as they are),
+    # keeping its transpose so that the PAE in both directions can be read as
+    # contiguous rows
+    if not isinstance(pae, np.ndarray):
+        pae = np.array(pae, dtype=float)
+    pae_transposed = np.ascontiguousarray(pae.T)
+    # PAE threshold for each residue distance
+    distances = np.arange(len(pae))
+    thresholds = np.where(distances <= res_dist_cutoff, close_pae_val, further_pae_val)
+
     domains = []
     next_domain_num = 1
 
     # Iterate through residues from start to end
     for res1 in range(0, len(pae)):
-        # Iterate through potential domain-mate residues, skipping nearby ones
-        # Start at end of protein and work in reverse
-        for res2 in range(len(pae)-1, res1 + 4, -1):
-
-            # Calculate the distance between residues being evaluated
-            res_difference = abs(res2 - res1)
-            # Find the PAE between the residues, looking at both directions
-            relative_pae = min(pae[res1][res2], pae[res2][res1])
-
-            # Determine if residues are in the same domain based on PAE and distance
-            is_same_domain = ((res_difference <= res_dist_cutoff and
-                               relative_pae < close_pae_val) or
-                              (res_difference > res_dist_cutoff and
-                               relative_pae < further_pae_val))
-
-            if is_same_domain:
-                domain_res1 = find_domain_by_res(domains, res1)
-                domain_res2 = find_domain_by_res(domains, res2)
-
-                if domain_res1 and not domain_res2:
-                    # Extend domain_res1 to include all res up to and including res2
-                    domain_res1.end = max(domain_res1.end, res2)
-                elif not domain_res1 and not domain_res2:
-                    # Create a new domain starting at res1 and ending at res2
-                    domains.append(Domain(f"AF_D{next_domain_num}", res1, res2, 'AF'))
-                    next_domain_num += 1
-
-                # Move to the next residue after processing a same domain pair
-                break
+        # Evaluate all potential domain-mate residues at once, skipping nearby
+        # ones. Find the PAE between the residues, looking at both directions
+        forward_pae = pae[res1, res1 + 5:]
+        reverse_pae = pae_transposed[res1, res1 + 5:]
+        relative_pae = np.where(reverse_pae < forward_pae, reverse_pae, forward_pae)
+
+        # Determine which residues are in the same domain based on PAE and
+        # distance, and take the furthest one from the end of the protein
+        same_domain = np.flatnonzero(relative_pae < thresholds[5:len(pae) - res1])
+        if same_domain.size:
+            res2 = res1 + 5 + int(same_domain[-1])
+            domain_res1 = find_domain_by_res(domains, res1)
+            domain_res2 = find_domain_by_res(domains, res2)
+
+            if domain_res1 and not domain_res2:
+                # Extend domain_res1 to include all res up to and including res2
+                domain_res1.end = max(domain_res1.end, res2)
+            elif not domain_res1 and not domain_res2:
+                # Create a new domain starting at res1 and ending at res2
+                domains.append(Domain(f"AF_D{next_domain_num}", res1, res2, 'AF'))
+                next_domain_num += 1
 
     return domains
@@ -7,7 +7,108 @@ Classes:
     - Domain: Represents a domain within a protein sequence.
     - Protein: Models a protein, including sequence, domains, and fragments.
     - ProteinSubsection: Represents a subsection of a protein sequence.
+
+Dependencies:
+    - numpy: For storing fragment boundaries as contiguous integer arrays.
 """
+import numpy as np
+
+# Maximum number of domains/fragments shown in the repr of a Protein
+REPR_MAX_ITEMS = 5
+
+class _FragmentList(list):
+    """
+    Read-only list of (start, end) fragment tuples, as returned by
+    Protein.fragment_list. Compares equal to a plain list with the same
+    fragments, but raises a TypeError if changed in place - as it is built from
+    the fragment arrays, changes to it would otherwise be silently lost.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        """
+        Raises a TypeError, in place of any method that would change the list.
+        """
+        raise TypeError("fragment_list is read-only - use add_fragment or "
+                        "add_fragments_bulk, or assign a new list, to change the "
+                        "fragments of a protein.")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def __reduce_ex__(self, protocol):
+        """
+        Copies and pickles the list by its items, rather than by appending to it.
+        """
+        return (_FragmentList, (list(self),))
+
+class _Fragments:
+    """
+    Fragment boundaries of a protein, stored as parallel int32 start/end arrays.
+    Held in a separate object so that a ProteinSubsection can share the
+    fragments of its parent protein. Fragments added one at a time are buffered
+    in lists and only joined onto the arrays when the arrays are next read, so
+    that adding fragments in a loop doesn't reallocate the arrays each time.
+    """
+    __slots__ = ('_starts', '_ends', '_new_starts', '_new_ends')
+
+    def __init__(self, starts, ends):
+        """
+        Initializes the fragment arrays, with no buffered fragments.
+        """
+        self._starts = starts
+        self._ends = ends
+        self._new_starts = []
+        self._new_ends = []
+
+    def _flush(self):
+        """
+        Joins any buffered fragments onto the fragment arrays.
+        """
+        if self._new_starts:
+            self._starts = np.concatenate((self._starts, np.array(self._new_starts, dtype=np.int32)))
+            self._ends = np.concatenate((self._ends, np.array(self._new_ends, dtype=np.int32)))
+            self._new_starts = []
+            self._new_ends = []
+
+    @property
+    def starts(self):
+        """
+        numpy.ndarray of fragment start positions, including buffered fragments.
+        """
+        self._flush()
+        return self._starts
+
+    @property
+    def ends(self):
+        """
+        numpy.ndarray of fragment end positions, including buffered fragments.
+        """
+        self._flush()
+        return self._ends
+
+    def last_start(self):
+        """
+        Returns the start of the last fragment, or None if there are no fragments.
+        """
+        if self._new_starts:
+            return self._new_starts[-1]
+        return int(self._starts[-1]) if self._starts.size else None
+
+    def append(self, start, end):
+        """
+        Buffers a single fragment, to be joined onto the arrays when next read.
+        """
+        self._new_starts.append(start)
+        self._new_ends.append(end)
+
+    def extend(self, starts, ends):
+        """
+        Joins arrays of fragment starts and ends onto the fragment arrays.
+        """
+        self._flush()
+        self._starts = np.concatenate((self._starts, starts.astype(np.int32)))
+        self._ends = np.concatenate((self._ends, ends.astype(np.int32)))
 
 class Domain:
     """
@@ -22,6 +123,8 @@ class Domain:
     Raises:
         - ValueError: If `start` or `end` is less than 0, or 'start' > 'end'.
     """
+    __slots__ = ('id', 'start', 'end', 'type')
+
     def __init__(self, identifier, start, end, domain_type):
         """
         Initializes a new instance of the Domain class.
@@ -76,13 +179,32 @@ class Protein:
         - name (str): Name of the protein.
         - accession_id (str): UniProt accession ID.
         - sequence (str): Amino acid sequence of the protein.
+        - sequence_bytes (bytes): ASCII encoded amino acid sequence, encoded
+          from the sequence on first access.
         - first_res (int): Index of the first residue.
         - last_res (int): Index of the last residue, defaults to the sequence length.
         - domain_list (list of Domain instances, optional): Domains within the protein.
         - fragment_list (list of tuples, optional): Fragments identified in the
           protein sequence, represented as a tuple in the form (start_pos, end_pos),
-          using pythonic slice notation (ie inclusive of start, exclusive of end).
+          using pythonic slice notation (ie inclusive of start, exclusive of end),
+          in order of start position.
+        - fragment_starts (numpy.ndarray): Start positions of the fragments, as
+          an int32 array parallel to fragment_ends.
+        - fragment_ends (numpy.ndarray): End positions of the fragments, as an
+          int32 array parallel to fragment_starts.
+
+    Note:
+        - Fragments are stored as the parallel fragment_starts/fragment_ends
+          arrays. fragment_list is built from these on access and is read-only -
+          use add_fragment or add_fragments_bulk, or assign a new list, to change
+          the fragments of a protein.
+        - Compatibility: fragment_list used to be a plain list attribute, which
+          could be changed in place (eg protein.fragment_list.append((s, e))).
+          Changing it in place now raises a TypeError.
     """
+    __slots__ = ('name', 'accession_id', '_sequence', '_sequence_bytes', 'first_res',
+                 'last_res', 'domain_list', '_fragments')
+
     def __init__(self, name, accession_id, sequence, first_res=0, last_res=None,
                 domain_list=None, fragment_list=None):
         """
@@ -101,6 +223,77 @@ class Protein:
         self.domain_list = domain_list if domain_list is not None else []
         self.fragment_list = fragment_list if fragment_list is not None else []
 
+    @property
+    def sequence(self):
+        """
+        Amino acid sequence of the protein.
+        """
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, sequence):
+        """
+        Sets the amino acid sequence, clearing any previously encoded bytes.
+        """
+        self._sequence = sequence
+        self._sequence_bytes = None
+
+    @property
+    def sequence_bytes(self):
+        """
+        ASCII encoded sequence, encoded once and reused - allows subsections to
+        hold zero-copy views of the sequence.
+        """
+        if self._sequence_bytes is None:
+            self._sequence_bytes = self._sequence.encode('ascii')
+        return self._sequence_bytes
+
+    @property
+    def sequence_length(self):
+        """
+        Number of residues in the sequence.
+        """
+        return len(self._sequence)
+
+    @property
+    def fragment_list(self):
+        """
+        Read-only list of (start, end) fragment tuples, built from the fragment
+        arrays.
+        """
+        return _FragmentList(zip(self.fragment_starts.tolist(), self.fragment_ends.tolist()))
+
+    @fragment_list.setter
+    def fragment_list(self, fragments):
+        """
+        Replaces the fragments of the protein with a list of (start, end) tuples,
+        in order of start position.
+
+        Raises:
+            - ValueError: If the fragments are not in order of start position.
+        """
+        fragments = list(fragments)
+        starts = np.array([start for start, _ in fragments], dtype=np.int32)
+        ends = np.array([end for _, end in fragments], dtype=np.int32)
+        if (np.diff(starts) < 0).any():
+            raise ValueError("Start of the new fragment must be greater than the "
+                             "start of the previous fragment.")
+        self._fragments = _Fragments(starts, ends)
+
+    @property
+    def fragment_starts(self):
+        """
+        numpy.ndarray of fragment start positions (pythonic slice notation).
+        """
+        return self._fragments.starts
+
+    @property
+    def fragment_ends(self):
+        """
+        numpy.ndarray of fragment end positions (pythonic slice notation).
+        """
+        return self._fragments.ends
+
     def add_domain(self, domain):
         """
         Adds a Domain instance to the protein's domain list.
@@ -147,11 +340,80 @@ class Protein:
         if start < self.first_res:
             raise ValueError("Start of the new fragment must be within the protein sequence bounds.")
 
-        if self.fragment_list and start < self.fragment_list[-1][0]:
+        last_start = self._fragments.last_start()
+        if last_start is not None and start < last_start:
+            raise ValueError("Start of the new fragment must be greater than the "
+                             "start of the previous fragment.")
+
+        self._fragments.append(start, end)
+
+    def add_fragments_bulk(self, fragments):
+        """
+        Adds several fragments to the protein's fragment list at once, validating
+        them together with array operations rather than one at a time. Applies
+        the same checks as add_fragment.
+
+        Parameters:
+            - fragments (list of tuples or numpy.ndarray): The fragments to add,
+              as (start, end) pairs or an array of shape (n, 2), in order of start
+              position.
+
+        Raises:
+            - ValueError: If fragments are not (start, end) pairs of integers, if
+              any start or end is negative or start is not less than end, if any
+              fragment does not fit within sequence bounds, or if the fragments
+              do not follow sequentially from each other and the last fragment
+              already added.
+        """
+        fragment_array = np.asarray(fragments)
+        if fragment_array.size == 0:
+            return
+        if fragment_array.ndim != 2 or fragment_array.shape[1] != 2:
+            raise ValueError("Invalid fragments. Provide a list of (start, end) tuples "
+                             "or an array of shape (n, 2).")
+        if not np.issubdtype(fragment_array.dtype, np.integer):
+            raise ValueError("Start and end must be positive integers, and start must be less than end.")
+
+        starts = fragment_array[:, 0]
+        ends = fragment_array[:, 1]
+        if not ((starts >= 0) & (starts < ends)).all():
+            raise ValueError("Start and end must be positive integers, and start must be less than end.")
+        if (ends > self.last_res + 1).any():
+            raise ValueError("End of the new fragment must be within the protein sequence bounds.")
+        if (starts < self.first_res).any():
+            raise ValueError("Start of the new fragment must be within the protein sequence bounds.")
+        last_start = self._fragments.last_start()
+        if ((np.diff(starts) < 0).any() or
+                (last_start is not None and starts[0] < last_start)):
             raise ValueError("Start of the new fragment must be greater than the "
                              "start of the previous fragment.")
 
-        self.fragment_list.append((start, end))
+        self._fragments.extend(starts, ends)
+
+    def overlapping_fragments(self, start, end):
+        """
+        Finds the fragments of the protein that overlap a given region.
+
+        Parameters:
+            - start (int): Start of the region (inclusive).
+            - end (int): End of the region (exclusive), using pythonic slice
+              notation as for fragments.
+
+        Returns:
+            - list of tuples: The (start, end) fragments overlapping the region,
+              in the order they are stored.
+
+        Note:
+            - Fragment starts are kept in sorted order by add_fragment,
+              add_fragments_bulk and the fragment_list setter, so the
+              fragments starting before the end of the region are found with a
+              binary search, and only these are checked for their end position.
+        """
+        candidates = np.searchsorted(self.fragment_starts, end, side='left')
+        starts = self.fragment_starts[:candidates]
+        ends = self.fragment_ends[:candidates]
+        overlapping = ends > start
+        return list(zip(starts[overlapping].tolist(), ends[overlapping].tolist()))
 
     def __str__(self):
         """
@@ -159,15 +421,24 @@ class Protein:
         name, accession ID, and the number of associated domains and fragments.
         """
         return (f"Protein Name: {self.name}, Accession ID: {self.accession_id}, "
-                f"Domains: {len(self.domain_list)}, Fragments: {len(self.fragment_list)}")
+                f"Domains: {len(self.domain_list)}, Fragments: {len(self.fragment_starts)}")
 
     def __repr__(self):
         """
         Returns a formal string representation of the Protein instance.
+        Only the first few domains and fragments are included, followed by a
+        count of any that are left out.
         """
-        domain_reprs = [repr(d) for d in self.domain_list]
-        fragment_reprs = [repr(f) for f in self.fragment_list]
-        sequence_repr = self.sequence[:10] + '...' if len(self.sequence) > 10 else self.sequence
+        domain_reprs = [repr(d) for d in self.domain_list[:REPR_MAX_ITEMS]]
+        if len(self.domain_list) > REPR_MAX_ITEMS:
+            domain_reprs.append(f"... (+{len(self.domain_list) - REPR_MAX_ITEMS} more)")
+        fragment_starts = self.fragment_starts
+        fragment_reprs = [repr(f) for f in zip(fragment_starts[:REPR_MAX_ITEMS].tolist(),
+                                               self.fragment_ends[:REPR_MAX_ITEMS].tolist())]
+        if len(fragment_starts) > REPR_MAX_ITEMS:
+            fragment_reprs.append(f"... (+{len(fragment_starts) - REPR_MAX_ITEMS} more)")
+        sequence = self.sequence
+        sequence_repr = f"{sequence[:10]}..." if len(sequence) > 10 else sequence
         return (f"Protein(name={repr(self.name)}, accession_id={repr(self.accession_id)}, "
                 f"sequence={repr(sequence_repr)}, "
                 f"first_res={self.first_res}, last_res={self.last_res}, "
@@ -186,10 +457,19 @@ class Protein:
         """
         if not isinstance(other, Protein):
             return NotImplemented
-        return (self.name == other.name and self.accession_id == other.accession_id and
-                self.sequence == other.sequence and self.first_res == other.first_res and
-                self.last_res == other.last_res and self.domain_list == other.domain_list and
-                self.fragment_list == other.fragment_list)
+        # Compare cheapest attributes first so unequal proteins are rejected early
+        if (self.name != other.name or self.accession_id != other.accession_id or
+                self.first_res != other.first_res or self.last_res != other.last_res):
+            return False
+        if (len(self.domain_list) != len(other.domain_list) or
+                len(self.fragment_starts) != len(other.fragment_starts)):
+            return False
+        if self.sequence != other.sequence:
+            return False
+        return (np.array_equal(self.fragment_starts, other.fragment_starts) and
+                np.array_equal(self.fragment_ends, other.fragment_ends) and
+                all(domain1 == domain2 for domain1, domain2
+                    in zip(self.domain_list, other.domain_list)))
 
 class ProteinSubsection(Protein):
     """
@@ -205,20 +485,54 @@ class ProteinSubsection(Protein):
 
     Note:
         - Start and end positions are expected to be in 0-based indexing, and inclusive of start and end.
+        - The subsection shares the domain list and fragments of the parent
+          protein, so fragments added to either are seen by both. Assigning a
+          new fragment_list to the subsection gives it its own fragments.
+        - The subsection does not store its own copy of the sequence - sequence
+          is sliced from the parent protein when accessed, and sequence_bytes is
+          a memoryview of the parent protein's sequence_bytes. Use
+          sequence_length where only the length is needed.
     """
+    __slots__ = ('parent_protein',)
+
     def __init__(self, parent_protein, start, end):
         """
         Initializes a new ProteinSubsection instance, including all parent domains and fragments.
         Validates that the start and end indices are within the parent protein's sequence boundaries.
         """
-        if start < 0 or end > len(parent_protein.sequence) -1 or start >= end:
-            raise ValueError(f"Invalid start ({start}) or end ({end}) for the parent protein sequence length {len(parent_protein.sequence)}. Start must be less than end.")
+        if start < 0 or end > parent_protein.sequence_length -1 or start >= end:
+            raise ValueError(f"Invalid start ({start}) or end ({end}) for the parent protein sequence length {parent_protein.sequence_length}. Start must be less than end.")
 
         super().__init__(parent_protein.name,
                          parent_protein.accession_id,
-                         parent_protein.sequence[start:end+1],
+                         None,
                          start,
                          end,
-                         parent_protein.domain_list,
-                         parent_protein.fragment_list)
+                         parent_protein.domain_list)
+        # Share the parent's fragments, rather than a copy
+        self._fragments = parent_protein._fragments
         self.parent_protein = parent_protein
+
+    @Protein.sequence.getter
+    def sequence(self):
+        """
+        Amino acid sequence of the subsection, sliced from the parent sequence.
+        """
+        return self.parent_protein.sequence[self.first_res:self.last_res+1]
+
+    @property
+    def sequence_bytes(self):
+        """
+        Zero-copy view of the subsection within the parent's sequence_bytes.
+        """
+        if self._sequence_bytes is None:
+            self._sequence_bytes = memoryview(self.parent_protein.sequence_bytes)[
+                self.first_res:self.last_res+1]
+        return self._sequence_bytes
+
+    @property
+    def sequence_length(self):
+        """
+        Number of residues in the subsection, without slicing the sequence.
+        """
+        return self.last_res - self.first_res + 1
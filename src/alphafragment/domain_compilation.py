@@ -22,7 +22,8 @@ from .alphafold_db_domain_identification import read_afdb_json, find_domains_fro
 from .process_proteins_csv import find_user_specified_domains
 
 def compile_domains(protein, uniprot=True, alphafold=True, manual=True,
-                    protein_data=None, pae_method="cautious", pae_custom_params=None):
+                    protein_data=None, pae_method="cautious", pae_custom_params=None,
+                    uniprot_cache_dir=None):
     """
     Compiles a list of Domain objects for a given protein, using domain data
     from UniProt, AlphaFold structure predictions, and/or manually specified
@@ -68,6 +69,9 @@ def compile_domains(protein, uniprot=True, alphafold=True, manual=True,
             fall below to be considered within the same domain, if the distance
             between them is greater than res_dist_cutoff. Set to 11 for close
             grouping method and 2 for definite grouping method.
+      - uniprot_cache_dir (str, optional): Directory in which to cache data
+        fetched from UniProt - see fetch_uniprot_info. Defaults to None (no
+        caching).
 
     Returns:
       - List of Domain objects: A list of Domain objects, each representing a
@@ -99,7 +103,7 @@ def compile_domains(protein, uniprot=True, alphafold=True, manual=True,
 
     # Find and add domains from UniProt
     if uniprot:
-        uniprot_domains = find_uniprot_domains(protein) or []
+        uniprot_domains = find_uniprot_domains(protein, cache_dir=uniprot_cache_dir) or []
         domains.extend(uniprot_domains)
 
     # Identify and add domains from AlphaFold structure predictions
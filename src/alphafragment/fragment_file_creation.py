@@ -55,36 +55,89 @@ def get_protein_combinations(proteins, method, combinations_csv, one_protein):
     if method == 'one' and not one_protein:
         raise ValueError("Method 'one' selected but no target protein specified.")
 
+    # Map protein names to proteins for the 'one' and 'specific' methods
+    protein_dict = {protein.name: protein for protein in proteins}
+
     # For 'all' method, compile all combinations of proteins
     if method == 'all':
         protein_pairs = list(combinations(proteins, 2)) + [(p, p) for p in proteins]
 
     # For 'one' method, find target protein + compile all combinations with it
     elif method == 'one':
-        target_protein = next((p for p in proteins if p.name == one_protein), None)
+        target_protein = protein_dict.get(one_protein)
         if not target_protein:
             raise ValueError(f"Protein named {one_protein} not found among the provided proteins.")
         protein_pairs = [(target_protein, p) for p in proteins]
 
     # For 'specific' method, read the desired combinations from the CSV
     elif method == 'specific':
-        protein_dict = {protein.name: protein for protein in proteins}
-        protein_pairs = []
         with open(combinations_csv, mode='r', encoding='utf-8', newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if row[0] and row[1]:
-                # Check if both proteins specified in the row exist in the protein list
-                    if row[0] in protein_dict and row[1] in protein_dict:
-                        protein_pairs.append((protein_dict[row[0]], protein_dict[row[1]]))
-                    else:
-                        # Print error message if one or both proteins are not found
-                        missing_proteins = [name for name in row[:2] if name not in protein_dict]
-                        print(f"Error: Combination {row[0]}-{row[1]} not possible. "
-                              f"Missing proteins: {', '.join(missing_proteins)}.")
+            name_pairs = [(row[0], row[1]) for row in csv.reader(csvfile)
+                          if len(row) >= 2 and row[0] and row[1]]
+        # Keep combinations where both proteins exist in the protein list
+        protein_pairs = [(protein_dict[name1], protein_dict[name2]) for name1, name2 in name_pairs
+                         if name1 in protein_dict and name2 in protein_dict]
+        # Only look for missing proteins if some combinations were dropped
+        if len(protein_pairs) != len(name_pairs):
+            for name1, name2 in name_pairs:
+                missing_proteins = [name for name in (name1, name2) if name not in protein_dict]
+                if missing_proteins:
+                    print(f"Error: Combination {name1}-{name2} not possible. "
+                          f"Missing proteins: {', '.join(missing_proteins)}.")
 
     return sorted(protein_pairs, key=lambda pair: (pair[0].name, pair[1].name))
 
+def _fragments(protein):
+    """
+    Returns the fragments of a protein as a list of (start, end) tuples, read
+    directly from the fragment arrays.
+    """
+    return list(zip(protein.fragment_starts.tolist(), protein.fragment_ends.tolist()))
+
+def _named_fragments(protein):
+    """
+    Returns a list of (name, sequence) tuples for the fragments of a protein,
+    with fragments named as '<protein name>_F<fragment number>'.
+    """
+    return [(f"{protein.name}_F{i+1}", protein.sequence[start:end])
+            for i, (start, end) in enumerate(_fragments(protein))]
+
+def _unique_fragment_pairs(protein1, protein2):
+    """
+    Generates the fragment pairs to combine for a pair of proteins, skipping
+    duplicates - (fragment1, fragment2) is the same as (fragment2, fragment1).
+    Shared by output_fastas and output_pulldown.
+
+    Parameters:
+        - protein1 (Protein): The first protein of the pair.
+        - protein2 (Protein): The second protein of the pair.
+
+    Yields:
+        - tuple: (i, start1, end1, j, start2, end2), where i and j are the
+          indices of the fragments within protein1 and protein2.
+
+    Note:
+        - For a protein paired with itself only the upper triangle of fragment
+          pairs is generated, which contains no duplicates. For other pairs,
+          fragments with the same positions in both orders are skipped.
+    """
+    fragments1 = _fragments(protein1)
+    if protein1 is protein2:
+        for i, (start1, end1) in enumerate(fragments1):
+            for j in range(i, len(fragments1)):
+                start2, end2 = fragments1[j]
+                yield i, start1, end1, j, start2, end2
+        return
+
+    fragments2 = _fragments(protein2)
+    fragment_pairs = set()
+    for i, (start1, end1) in enumerate(fragments1):
+        for j, (start2, end2) in enumerate(fragments2):
+            if (start1, end1, start2, end2) in fragment_pairs or (start2, end2, start1, end1) in fragment_pairs:
+                continue
+            fragment_pairs.add((start1, end1, start2, end2))
+            yield i, start1, end1, j, start2, end2
+
 def output_fastas(proteins, save_location=None, method='all', combinations_csv=None, one_protein=None):
     """
     Creates a folder for each protein pair, containing fasta files for each combination
@@ -111,29 +164,28 @@ def output_fastas(proteins, save_location=None, method='all', combinations_csv=N
     """
     protein_pairs = get_protein_combinations(proteins, method, combinations_csv, one_protein)
 
+    sep = os.sep
+    created_folders = set()
     for protein1, protein2 in protein_pairs:
         if save_location:
             folder_path = os.path.join(save_location, f"{protein1.name}_{protein2.name}")
         else:
             folder_path = f"{protein1.name}_{protein2.name}"
-        os.makedirs(folder_path, exist_ok=True)
-
-        fragment_pairs=[]
-        for i, (start1, end1) in enumerate(protein1.fragment_list):
-            for j, (start2, end2) in enumerate(protein2.fragment_list):
-                #don't create duplicate files (fragment1, fragment2) == (fragment2, fragment1)
-                if (start1, end1, start2, end2) in fragment_pairs or (start2, end2, start1, end1) in fragment_pairs:
-                    continue
-
-                #if not duplicate, create file
-                fragment_pairs.append((start1, end1, start2, end2))
-                filename = os.path.join(folder_path,
-                                        f"{protein1.name}_F{i+1}+{protein2.name}_F{j+1}.fasta")
-                content = (f">{protein1.name}_F{i+1}+{protein2.name}_F{j+1}\n"
-                           f"{protein1.sequence[start1:end1]}:{protein2.sequence[start2:end2]}")
-                with open(filename, 'w', encoding='utf-8') as file:
-                    file.write(content)
-                print(f"File created: {filename}")
+        if folder_path not in created_folders:
+            os.makedirs(folder_path, exist_ok=True)
+            created_folders.add(folder_path)
+
+        # Fragment names and sequences are built once per fragment, not once per file
+        named_fragments1 = _named_fragments(protein1)
+        named_fragments2 = named_fragments1 if protein2 is protein1 else _named_fragments(protein2)
+        for i, _, _, j, _, _ in _unique_fragment_pairs(protein1, protein2):
+            name1, sequence1 = named_fragments1[i]
+            name2, sequence2 = named_fragments2[j]
+            filename = f"{folder_path}{sep}{name1}+{name2}.fasta"
+            content = f">{name1}+{name2}\n{sequence1}:{sequence2}"
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write(content)
+            print(f"File created: {filename}")
 
 def output_pulldown(proteins, output_name='pulldown_input.txt', method='all',
                     combinations_csv=None, one_protein=None):
@@ -159,19 +211,17 @@ def output_pulldown(proteins, output_name='pulldown_input.txt', method='all',
     """
     protein_pairs = get_protein_combinations(proteins, method, combinations_csv, one_protein)
 
-    pulldown_lines = []
+    # Lines are encoded as they are built, so the file can be written directly as bytes
+    pulldown_bytes = bytearray()
     for protein1, protein2 in protein_pairs:
-        fragment_pairs=[]
-        for _, (start1, end1) in enumerate(protein1.fragment_list):
-            for _, (start2, end2) in enumerate(protein2.fragment_list):
-                # don't create duplicate files (fragment1, fragment2) == (fragment2, fragment1)
-                if (start1, end1, start2, end2) in fragment_pairs or (start2, end2, start1, end1) in fragment_pairs:
-                    continue
-                line = (f"{protein1.accession_id},{start1+1}-{end1};"
-                        f"{protein2.accession_id},{start2+1}-{end2}")
-                pulldown_lines.append(line)
-                fragment_pairs.append((start1, end1, start2, end2))
-
-    with open(output_name, 'w',  encoding='utf-8') as file:
-        file.write('\n'.join(pulldown_lines))
+        accession1 = protein1.accession_id.encode('utf-8')
+        accession2 = protein2.accession_id.encode('utf-8')
+        for _, start1, end1, _, start2, end2 in _unique_fragment_pairs(protein1, protein2):
+            if pulldown_bytes:
+                pulldown_bytes += b'\n'
+            pulldown_bytes += b"%s,%d-%d;%s,%d-%d" % (accession1, start1+1, end1,
+                                                      accession2, start2+1, end2)
+
+    with open(output_name, 'wb') as file:
+        file.write(pulldown_bytes)
     print(f"File created: {output_name}")
@@ -13,18 +13,85 @@ Functions:
 Dependencies:
   - .fragmentation_methods.validate_fragmentation_parameters: Validates
     the parameters used for protein fragmentation.
-  - .fragmentation_methods.recursive_fragmentation: Used for recursively fragmenting
-    protein sections that are not classified as long domains.
-  - .fragmentation_methods.merge_overlapping_domains: Merges overlapping
-    domains within a list of domains, and outputs as a new list
-  - .long_domains.handle_long_domains: Handles the fragmentation of long domains
-    within the protein.
+  - .fragmentation_methods._cutpoint_mask and ._fragment_search: The search
+    behind recursive_fragmentation, used directly for fragmenting protein
+    sections that are not classified as long domains, so that parameters are
+    validated and domains converted only once per protein section.
+  - .fragmentation_methods._Overlap: Fixed-shape form of the overlap
+    dictionary, passed to the search once validated.
+  - .fragmentation_methods._merge_domain_bounds: Merges overlapping domains
+    within a list of domains, and outputs their start and end positions as arrays
+  - .long_domains._handle_long_domains: Handles the fragmentation of long domains
+    within the protein, without validating parameters again.
+  - concurrent.futures.ProcessPoolExecutor: Optionally used to fragment
+    protein sections in parallel.
+  - itertools.repeat: Passes the shared parameters to each parallel section.
 """
 
-from .fragmentation_methods import validate_fragmentation_parameters, recursive_fragmentation, merge_overlapping_domains
-from .long_domains import handle_long_domains
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-def fragment_protein(protein, min_len = 150, max_len = 250, overlap = None, len_increase = 10):
+from .fragmentation_methods import validate_fragmentation_parameters, _merge_domain_bounds, _cutpoint_mask, _fragment_search, _Overlap
+from .long_domains import _handle_long_domains
+
+def _fragment_within(first_res, last_res, mask, min_len, max_len, overlap):
+    """
+    Fragments a protein section with a given maximum length, returning the list
+    of fragment cutpoints, or None if no fragmentation is possible.
+    """
+    # Deal with short proteins/sections by classifying as one fragment
+    if last_res - first_res + 1 <= max_len:
+        return [(first_res, last_res+1)]
+
+    return _fragment_search(first_res, mask, last_res, min_len, max_len,
+                            overlap.min, overlap.ideal, overlap.max)
+
+def _fragment_subsection(name, first_res, last_res, domain_starts, domain_ends,
+                         min_len, max_len, overlap, len_increase):
+    """
+    Fragments a single protein section, increasing the maximum length if a
+    solution cannot be found. Takes only plain values, arrays and an _Overlap
+    rather than Protein objects, so that it can be run in a worker process.
+
+    Returns:
+      - tuple of (list of tuples, int): The fragment cutpoints for the section,
+        and the maximum length used to find them (increased from max_len if
+        needed).
+
+    Raises:
+      - ValueError: If len_increase is not greater than 0 and the maximum length
+        needs to be increased to find a solution.
+    """
+    mask = _cutpoint_mask(domain_starts, domain_ends, last_res)
+    fragments = _fragment_within(first_res, last_res, mask, min_len, max_len, overlap)
+    if fragments is not None:
+        return fragments, max_len
+
+    # Increasing max length only ever allows more fragmentations, so rather than
+    # trying each increase in turn, bisect for the smallest number of increases
+    # that gives a solution. Enough increases to reach the length of the section
+    # always give a solution (one fragment)
+    if len_increase <= 0:
+        raise ValueError("len_increase must be greater than 0 when no "
+                         f"fragmentation of {name} is found with a maximum "
+                         f"length of {max_len}.")
+    sequence_length = last_res - first_res + 1
+    fewest, most = 1, -(-(sequence_length - max_len) // len_increase)
+    solutions = {most: [(first_res, last_res+1)]}
+    while fewest < most:
+        increases = (fewest + most) // 2
+        solution = _fragment_within(first_res, last_res, mask, min_len,
+                                    min(max_len + increases*len_increase, sequence_length),
+                                    overlap)
+        if solution is None:
+            fewest = increases + 1
+        else:
+            most = increases
+            solutions[most] = solution
+    return solutions[most], min(max_len + most*len_increase, sequence_length)
+
+def fragment_protein(protein, min_len = 150, max_len = 250, overlap = None, len_increase = 10,
+                     max_workers = None):
     """
     Fragments a given protein into smaller, manageable sections. Initially, it
     identifies long domains within the protein and organises fragments around
@@ -39,7 +106,9 @@ def fragment_protein(protein, min_len = 150, max_len = 250, overlap = None, len_
         and sequence information.
       - min_len (int): The minimum acceptable length for a protein fragment.
       - max_len (int): The initial maximum acceptable length for a protein
-        fragment, adjusted dynamically for certain subsections.
+        fragment, adjusted dynamically for certain subsections. An increase
+        carries over to the subsections fragmented after it (unless max_workers
+        is given).
       - overlap (dict, optional): Dictionary containing the ideal, minimum, and
         maximum overlap values, in the format:
         {'min':min_overlap, 'ideal':ideal_overlap, 'max':max_overlap}
@@ -48,10 +117,26 @@ def fragment_protein(protein, min_len = 150, max_len = 250, overlap = None, len_
         the default values are used: {'min':0, 'ideal':10, 'max':30}
       - len_increase (int, optional): The amount by which to incrementally increase
         the maximum fragment length if a solution cannot be found. Default is 10.
+      - max_workers (int, optional): If given, the protein sections between long
+        domains are fragmented in parallel, in up to this many worker processes.
+        Sections are then fragmented independently, so an increase in max_len
+        only applies to the section that needed it, and results may differ from
+        fragmenting one at a time. Default is None, in which case sections are
+        fragmented one at a time in the current process, in order.
 
     Returns:
       - list of tuples: A sorted list of tuples, where each tuple represents a
         fragment with its start and end positions within the protein sequence.
+
+    Raises:
+      - ValueError: If len_increase is not greater than 0 and the maximum length
+        needs to be increased to find a solution.
+
+    Note:
+      - Worker processes are only worth starting for proteins with many long
+        domains, and so many sections. When using max_workers on platforms that
+        start processes by spawning (Windows and macOS), calling code must be
+        guarded by if __name__ == '__main__'.
     """
     if not overlap:
         overlap = {'min':0, 'ideal':10, 'max':30}
@@ -59,27 +144,41 @@ def fragment_protein(protein, min_len = 150, max_len = 250, overlap = None, len_
     # Validate the input parameters
     validate_fragmentation_parameters(protein, min_len, max_len, overlap)
 
-    subsections, fragments = handle_long_domains(protein, min_len, max_len, overlap)
+    # Parameters have already been validated, so skip validating them again
+    subsections, fragments = _handle_long_domains(protein, min_len, max_len, overlap)
+    section_overlap = _Overlap(overlap['min'], overlap['ideal'], overlap['max'])
 
+    # Subsections share their parent's domain list, so each list is only merged once
+    merged_bounds_by_list = {}
+    tasks = []
     for subsection in subsections:
-        merged_domains = merge_overlapping_domains(subsection.domain_list)
-        subsection_fragments = None
-        while subsection_fragments is None:
-            # Deal with short proteins/sections by classifying as one fragment
-            # included in while loop so as max length increases this is still happening
-            if len(subsection.sequence) <= max_len:
-                subsection_fragments = [(subsection.first_res, subsection.last_res+1)]
-                continue
-
-            subsection_fragments = recursive_fragmentation(subsection, merged_domains,
-                                                           subsection.first_res,
-                                                           min_len, max_len, overlap)
-            if subsection_fragments is None:
-                max_len = min(max_len + len_increase, len(subsection.sequence))
-        fragments.extend(subsection_fragments)
+        if id(subsection.domain_list) not in merged_bounds_by_list:
+            _, domain_starts, domain_ends = _merge_domain_bounds(subsection.domain_list)
+            merged_bounds_by_list[id(subsection.domain_list)] = (domain_starts, domain_ends)
+        domain_starts, domain_ends = merged_bounds_by_list[id(subsection.domain_list)]
+        tasks.append((subsection.name, subsection.first_res, subsection.last_res,
+                      domain_starts, domain_ends))
+
+    if max_workers is None or len(tasks) < 2:
+        # Fragment subsections in order, carrying any increase in max_len over
+        # to the subsections that follow
+        for task in tasks:
+            subsection_fragments, max_len = _fragment_subsection(
+                *task, min_len, max_len, section_overlap, len_increase)
+            fragments.extend(subsection_fragments)
+    else:
+        # Fragmented independently, subsections can be run in parallel
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_fragment_subsection, *zip(*tasks),
+                                   repeat(min_len), repeat(max_len),
+                                   repeat(section_overlap), repeat(len_increase))
+            for subsection_fragments, _ in results:
+                fragments.extend(subsection_fragments)
 
     fragments.sort()
-    print(protein.name, " is ", len(protein.sequence), " residues long and has ",
-          len(fragments), "fragments", ":", fragments)
+    # Only the number of fragments is reported - the fragments themselves are
+    # returned, and formatting the full list is costly for long proteins
+    print(f"{protein.name} is {protein.sequence_length} residues long and has "
+          f"{len(fragments)} fragments")
 
     return fragments
@@ -4,6 +4,8 @@ Internal utility functions for protein fragmention process.
 Functions:
     - validate_fragmentation_parameters: Validates the parameters used for
       protein fragmentation.
+    - _domains_to_soa: Converts a list of domains into arrays of their starts,
+      ends, ids and types.
     - merge_overlapping_domains: Merges overlapping domains within a list of
       domains.
     - check_valid_cutpoint: Helper function to validate potential fragment
@@ -11,11 +13,21 @@ Functions:
     - recursive_fragmentation: Main function for recursively generating fragments.
     
 Dependencies:
+    - numpy: For merging domains and finding valid cutpoints.
     - Domain: A class representing a domain within a protein sequence.
     - Protein: A class representing a protein sequence.
 """
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import numpy as np
+
 from .classes import Domain, Protein
 
+# Fixed-shape form of a validated overlap dictionary, used internally so that
+# overlap values are read as attributes rather than looked up by key
+_Overlap = namedtuple('_Overlap', ['min', 'ideal', 'max'])
+
 def validate_fragmentation_parameters(protein, min_len, max_len, overlap):
     """
     Validates the parameters used for protein fragmentation.
@@ -54,28 +66,80 @@ def validate_fragmentation_parameters(protein, min_len, max_len, overlap):
     if not isinstance(overlap, dict):
         raise TypeError("Overlap must be a dictionary.")
 
-    # Check that the overlap dictionary contains the required keys
-    if not all(key in overlap for key in ['min', 'ideal', 'max']):
-        raise ValueError("Overlap dictionary must contain keys 'min', 'ideal', and 'max'.")
+    # Check that the overlap dictionary contains the required keys, looking each
+    # value up only once
+    try:
+        overlap_min, overlap_ideal, overlap_max = overlap['min'], overlap['ideal'], overlap['max']
+    except KeyError:
+        raise ValueError("Overlap dictionary must contain keys 'min', 'ideal', and 'max'.") from None
 
     # Check that the overlap values are integers
-    if not all(isinstance(overlap[key], int) for key in ['min', 'ideal', 'max']):
+    if not (isinstance(overlap_min, int) and isinstance(overlap_ideal, int)
+            and isinstance(overlap_max, int)):
         raise TypeError("Overlap values must be integers.")
 
     # Check that the minimum overlap is less than or equal to the maximum overlap
-    if overlap['min'] > overlap['max']:
-        raise ValueError(f"Minimum overlap ({overlap['min']}) must be less than "
-                         f"or equal to maximum overlap ({overlap['max']}).")
+    if overlap_min > overlap_max:
+        raise ValueError(f"Minimum overlap ({overlap_min}) must be less than "
+                         f"or equal to maximum overlap ({overlap_max}).")
 
     # Check that the ideal overlap is within the min and max overlap bounds
-    if not overlap['min'] <= overlap['ideal'] <= overlap['max']:
+    if not overlap_min <= overlap_ideal <= overlap_max:
         raise ValueError("Ideal overlap must be within the min and max overlap bounds.")
 
     # Check that the maximum overlap is less than the minimum fragment length
-    if overlap['max'] >= min_len:
-        raise ValueError(f"Maximum overlap ({overlap['max']}) must be less than the minimum "
+    if overlap_max >= min_len:
+        raise ValueError(f"Maximum overlap ({overlap_max}) must be less than the minimum "
                          f"fragment length ({min_len}) to avoid overlap-length conflicts.")
 
+def _domains_to_soa(domains):
+    """
+    Converts a list of Domain objects into parallel arrays of their attributes,
+    so that hot paths can work on contiguous positions rather than reading
+    attributes from each Domain object.
+
+    Parameters:
+        - domains (list of Domain): List of domain objects.
+
+    Returns:
+        - tuple: (starts, ends, ids, types) - int64 arrays of domain start and
+          end positions, and lists of domain ids and types, all in the same
+          order as domains.
+    """
+    count = len(domains)
+    starts = np.fromiter((domain.start for domain in domains), dtype=np.int64, count=count)
+    ends = np.fromiter((domain.end for domain in domains), dtype=np.int64, count=count)
+    ids = [domain.id for domain in domains]
+    types = [domain.type for domain in domains]
+    return starts, ends, ids, types
+
+def _merge_domain_bounds(domains):
+    """
+    Finds which domains overlap, working on contiguous arrays of domain start and
+    end positions rather than on Domain objects.
+
+    Returns:
+        - tuple: (firsts, starts, ends), int64 arrays with one entry per merged
+          domain, sorted by start - the index in domains of the first domain in
+          each merged domain, and the start and end of each merged domain.
+    """
+    starts, ends, _, _ = _domains_to_soa(domains)
+    if not domains:
+        return starts, starts, ends
+
+    # Sort domains by their start positions
+    order = np.argsort(starts, kind='stable')
+    sorted_starts = starts[order]
+    sorted_ends = ends[order]
+
+    # A domain starts a new merged domain if it starts after the end of every
+    # domain before it; otherwise it overlaps with (and is merged into) the last one
+    running_end = np.maximum.accumulate(sorted_ends)
+    group_firsts = np.flatnonzero(np.concatenate(([True], sorted_starts[1:] > running_end[:-1])))
+
+    return (order[group_firsts], sorted_starts[group_firsts],
+            np.maximum.reduceat(sorted_ends, group_firsts))
+
 def merge_overlapping_domains(domains):
     """
     Merges overlapping domains within a list of domains.
@@ -87,22 +151,16 @@ def merge_overlapping_domains(domains):
         - list of Domain: A list of domains where overlapping domains have been
           merged into single entries.
     """
-    # Sort domains by their start positions
-    sorted_domains = sorted(domains, key=lambda x: x.start)
-    combined_domains = []
+    firsts, _, ends = _merge_domain_bounds(domains)
 
-    for domain in sorted_domains:
-        if not combined_domains:
+    combined_domains = []
+    for first, end in zip(firsts.tolist(), ends.tolist()):
+        domain = domains[first]
+        if domain.end == end:
             combined_domains.append(domain)
         else:
-            last = combined_domains[-1]
-            # Check if the current domain overlaps with the last one in the list
-            if domain.start <= last.end:
-                # Merge the two domains by updating the end of the last domain
-                combined_domains[-1] = Domain(last.id, last.start,
-                                              max(last.end, domain.end), last.type)
-            else:
-                combined_domains.append(domain)
+            # Merged domains keep the id, start and type of the first domain
+            combined_domains.append(Domain(domain.id, domain.start, end, domain.type))
 
     return combined_domains
 
@@ -136,6 +194,232 @@ def check_valid_cutpoint(res, domains, sequence_end):
 
     return True
 
+def _is_valid_cutpoint(res, domain_starts, domain_ends, sequence_end):
+    """
+    Checks if a slicing index is a valid cutpoint, given the start and end
+    positions of merged domains (as by _merge_domain_bounds), sorted by start
+    and not overlapping. See check_valid_cutpoint.
+
+    Note:
+        - Merging doesn't change which cutpoints are valid, but means that the
+          only domain that could contain res can be found by bisection, so each
+          check is O(log D) rather than O(D).
+    """
+    # Check if res is beyond the end or before the start of the sequence
+    if res > sequence_end + 1 or res < 0:
+        return False
+
+    # If slicing index will cut at end of sequence, this is always valid
+    if res == sequence_end + 1:
+        return True
+
+    # Check if current and previous res are within the same domain
+    # (if both are in same domain, cutting before res would split the domain)
+    i = bisect_right(domain_starts, res) - 1
+    return not (i >= 0 and domain_starts[i] <= res - 1 and res <= domain_ends[i])
+
+def _cutpoint_mask(domain_starts, domain_ends, sequence_end):
+    """
+    Marks which slicing indices would cut through a domain.
+
+    Parameters:
+        - domain_starts (numpy.ndarray): Start positions of the domains within the
+          protein.
+        - domain_ends (numpy.ndarray): End positions of the domains, in the same
+          order as domain_starts.
+        - sequence_end (int): The last residue position in the protein sequence.
+
+    Returns:
+        - bytearray: Of length sequence_end + 2, where mask[res] is 1 if res and
+          res-1 are within the same domain (so slicing before res would split the
+          domain), and 0 otherwise. A slicing index res is therefore a valid
+          cutpoint if 0 <= res <= sequence_end + 1 and not mask[res].
+    """
+    # Slicing indices from start+1 to end (inclusive) cut through a domain.
+    # Clip to the sequence, as subsections share their parent's domains.
+    # Cutting at the end of the sequence is always valid, so stays unmarked.
+    first_cut = np.clip(domain_starts + 1, 0, sequence_end + 1)
+    after_last_cut = np.clip(domain_ends + 1, 0, sequence_end + 1)
+    in_sequence = first_cut < after_last_cut
+
+    # Count the domains covering each index by summing +1 at the first index
+    # and -1 after the last index of each domain
+    change = np.zeros(sequence_end + 3, dtype=np.int64)
+    np.add.at(change, first_cut[in_sequence], 1)
+    np.add.at(change, after_last_cut[in_sequence], -1)
+    covered = np.cumsum(change[:sequence_end + 2]) > 0
+
+    return bytearray(covered.astype(np.uint8).tobytes())
+
+def _find_next_start(res, mask, last_res, overlap_min, overlap_ideal, overlap_max):
+    """
+    Finds the start of the next fragment, given a fragment ending at res.
+
+    Each overlap window is checked with a single scan of the cutpoint mask for
+    an unmarked (valid) position, so the cost depends only on the overlap range.
+
+    Returns:
+        - int or None: The start of the next fragment, or None if no suitable
+          start is found or if moving the current fragment end would allow a
+          better overlap.
+    """
+    # Use ideal overlap if possible
+    if res - overlap_ideal >= 0 and not mask[res - overlap_ideal]:
+        return res - overlap_ideal
+    # Force None if moving current fragment end would allow better overlap with new fragment
+    # (the scan stops at the end of the mask, as nothing beyond the sequence is a
+    # valid cutpoint). The current end itself is always valid, so isn't a move -
+    # without excluding it a minimum overlap of 0 would always force None here,
+    # and overlap would never be adjusted
+    low = max(overlap_min, 1)
+    if low <= overlap_max and mask.find(0, res + low, res + overlap_max + 1) != -1:
+        return None
+    # Attempt to find a valid cutpoint by first increasing overlap - the smallest
+    # increase is the last valid position in the window
+    low = max(res - overlap_max, 0)
+    high = res - overlap_ideal - 1
+    if low <= high:
+        position = mask.rfind(0, low, high + 1)
+        if position != -1:
+            return position
+    # Then by decreasing overlap - the smallest decrease is the first valid
+    # position in the window
+    low = max(res - overlap_ideal + 1, 0)
+    high = res - overlap_min
+    if low <= high:
+        position = mask.find(0, low, high + 1)
+        if position != -1:
+            return position
+    # If no valid cutpoint is found within overlap boundaries, return None
+    return None
+
+def _can_fragment_length(length, min_len, max_len, overlap_ideal):
+    """
+    Checks if a stretch of sequence with no domains can be split into fragments,
+    each overlapping the one before it by overlap_ideal.
+
+    Note:
+        - k + 1 such fragments cover between min_len + k*(min_len - overlap_ideal)
+          and max_len + k*(max_len - overlap_ideal) residues, and every length in
+          between, so the stretch can be fragmented if this holds for some k >= 0.
+    """
+    if length < min_len:
+        return False
+    # Smallest k for which length is within reach of the longest fragments
+    fewest = max(0, -(-(length - max_len) // (max_len - overlap_ideal)))
+    # Largest k for which length is not exceeded by the shortest fragments
+    most = (length - min_len) // (min_len - overlap_ideal)
+    return fewest <= most
+
+def _domain_free_fragments(fragment_start, last_res, min_len, max_len,
+                           overlap_ideal, cutpoints):
+    """
+    Fragments a stretch of sequence with no domains, giving the same fragments
+    as _fragment_search without searching over every possible fragment start.
+
+    With no domains every slicing index is a valid cutpoint, so each fragment
+    after the first starts at the ideal overlap with the one before. Each
+    fragment is therefore given the shortest length from which the rest of the
+    sequence can still be fragmented, which only depends on the length left.
+
+    Returns:
+        - list of tuples or None: As for _fragment_search.
+    """
+    sequence_end = last_res + 1
+    if not _can_fragment_length(sequence_end - fragment_start, min_len, max_len, overlap_ideal):
+        return None
+
+    start = fragment_start
+    while True:
+        remaining = sequence_end - start
+        for length in range(min_len, min(max_len, remaining) + 1):
+            if length == remaining:
+                cutpoints.append((start, sequence_end))
+                return cutpoints
+            if _can_fragment_length(remaining - length + overlap_ideal,
+                                    min_len, max_len, overlap_ideal):
+                break
+        cutpoints.append((start, start + length))
+        start += length - overlap_ideal
+
+def _fragment_search(fragment_start, mask, last_res, min_len, max_len,
+                     overlap_min, overlap_ideal, overlap_max, cutpoints=None):
+    """
+    Search kernel for recursive_fragmentation, working only on integers and a
+    cutpoint mask as returned by _cutpoint_mask.
+
+    Rather than recursing, works backwards from the end of the sequence,
+    recording for each possible fragment start the first fragment end (in the
+    order the recursive search would try them) from which the rest of the
+    sequence can also be fragmented. The fragments are then read off by
+    following these choices forwards from fragment_start. If no slicing index
+    from fragment_start on cuts through a domain, the same fragments are found
+    directly by _domain_free_fragments.
+
+    Returns:
+        - list of tuples or None: The list of fragment cutpoints if successful,
+          appended in place to cutpoints if given; otherwise, None (leaving
+          cutpoints unchanged).
+    """
+    if fragment_start > last_res:
+        return None
+
+    if cutpoints is None:
+        cutpoints = []
+
+    if mask.find(1, fragment_start) == -1:
+        return _domain_free_fragments(fragment_start, last_res, min_len, max_len,
+                                      overlap_ideal, cutpoints)
+
+    # Find all valid cutpoints in one pass over the mask, so that only these are
+    # tried as fragment ends
+    valid_cutpoints = np.flatnonzero(np.frombuffer(mask, dtype=np.uint8) == 0).tolist()
+
+    # fragment_ends[r] is the end of the fragment starting at r (-1 if none is
+    # possible) and next_starts[r] the start of the fragment that follows it
+    fragment_ends = [-1] * (last_res + 2)
+    next_starts = [-1] * (last_res + 2)
+    # The start of the fragment following one that ends at a cutpoint only
+    # depends on that cutpoint, but the same cutpoint is tried as the end of
+    # many fragments, so next_start_after[res] keeps it once found (-2 if not
+    # yet found, -1 if there is none)
+    next_start_after = [-2] * (last_res + 2)
+
+    # A fragment starting after last_res + 1 - min_len can't reach min_len
+    # before the end of the sequence, so the search starts from there
+    for start in range(last_res + 1 - min_len, fragment_start - 1, -1):
+        # Iterate over valid fragment end cutpoints from min_len to max_len
+        first = bisect_left(valid_cutpoints, start + min_len)
+        last = bisect_right(valid_cutpoints, min(start + max_len, last_res + 1))
+        for i in range(first, last):
+            res = valid_cutpoints[i]
+            # If the current fragment end is at the end of the protein, finalize here.
+            if res == last_res + 1:
+                fragment_ends[start] = res
+                break
+            # If a valid start for the next fragment is found, from which the
+            # rest of the sequence can be fragmented, use this fragment end
+            next_start = next_start_after[res]
+            if next_start == -2:
+                next_start = _find_next_start(res, mask, last_res,
+                                              overlap_min, overlap_ideal, overlap_max) or -1
+                next_start_after[res] = next_start
+            if next_start != -1 and fragment_ends[next_start] != -1:
+                fragment_ends[start] = res
+                next_starts[start] = next_start
+                break
+
+    # If no valid fragmentation starts at fragment_start, return None to indicate failure
+    if fragment_ends[fragment_start] == -1:
+        return None
+
+    start = fragment_start
+    while fragment_ends[start] != last_res + 1:
+        cutpoints.append((start, fragment_ends[start]))
+        start = next_starts[start]
+    cutpoints.append((start, last_res + 1))
+    return cutpoints
+
 def recursive_fragmentation(protein, domains, fragment_start, min_len, max_len,
                             overlap, cutpoints=None):
     """
@@ -161,51 +445,20 @@ def recursive_fragmentation(protein, domains, fragment_start, min_len, max_len,
     Returns:
         - list of tuples or None: The list of fragment cutpoints if successful;
           otherwise, None.
+
+    Note:
+        - The domains are merged into arrays of start and end positions and
+          converted once to a mask of the slicing indices that would cut through
+          a domain, and the search itself is run by
+          _fragment_search on this mask, so each cutpoint check is a single
+          lookup. Valid fragment ends are taken from a sorted list of all valid
+          cutpoints, and the mask is a bytearray, so that the candidate starts
+          for the next fragment can be found with a single find/rfind scan of
+          each overlap window.
     """
     validate_fragmentation_parameters(protein, min_len, max_len, overlap)
 
-    def find_next_start(res):
-        # Use ideal overlap if possible
-        if check_valid_cutpoint(res - overlap['ideal'], domains, protein.last_res):
-            return res - overlap['ideal']
-        # Force None if moving current fragment end would allow better overlap with new fragment
-        for forwards_res in range(overlap['max'], overlap['min'] - 1, -1):
-            if check_valid_cutpoint(res + forwards_res, domains, protein.last_res):
-                return None
-        # Attempt to find a valid cutpoint by first increasing, then decreasing overlap
-        for adjusted_overlap in (list(range(overlap['ideal'] + 1, overlap['max'] + 1)) +
-                                 list(range(overlap['ideal'] - 1, overlap['min'] - 1, -1))):
-            if check_valid_cutpoint(res - adjusted_overlap, domains, protein.last_res):
-                return res - adjusted_overlap
-        # If no valid cutpoint is found within overlap boundaries, return None
-        return None
-
-    if cutpoints is None:
-        cutpoints = []
-
-    # Iterate over possible fragment end cutpoints from min_len to max_len
-    for res in range(fragment_start + min_len,
-                     min(fragment_start + max_len, protein.last_res + 1) + 1):
-        if check_valid_cutpoint(res, domains, protein.last_res):
-            # If the current fragment end is at the end of the protein, finalize here.
-            if res == protein.last_res + 1:
-                cutpoints.append((fragment_start, res))
-                return cutpoints
-            # If a valid cutpoint to start the next fragment is found, add it to the list and continue
-            next_start = find_next_start(res)
-            if next_start:
-                cutpoints.append((fragment_start, res))
-
-                # Recursively process the next segment
-                result = recursive_fragmentation(protein, domains, next_start,
-                                                 min_len, max_len, overlap, cutpoints)
-
-                # If a valid fragmentation pattern is found, return the result
-                if result is not None:
-                    return result
-                # If the recursive call did not find a valid pattern, remove the
-                # last added cutpoints
-                cutpoints.pop()
-
-    # If no valid cut is found in the loop, return None to indicate failure
-    return None
+    _, domain_starts, domain_ends = _merge_domain_bounds(domains)
+    mask = _cutpoint_mask(domain_starts, domain_ends, protein.last_res)
+    return _fragment_search(fragment_start, mask, protein.last_res, min_len, max_len,
+                            overlap['min'], overlap['ideal'], overlap['max'], cutpoints)
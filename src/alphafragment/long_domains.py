@@ -9,20 +9,22 @@ Functions:
   - handle_long_domains: Main function to handle long domains in proteins, creating
     fragments and identifying adjacent unfragmented regions which are output as a
     list of ProteinSubsection objects.
+  - _handle_long_domains: handle_long_domains without parameter validation, for
+    callers that have already validated the parameters.
 
 Dependencies:
   - .classes.ProteinSubsection: Used to represent sections of a protein,
     including domains and fragments.
   - .fragmentation_methods.validate_fragmentation_parameters: Used to
     validate the input parameters for protein fragmentation.
-  - .fragmentation_methods.check_valid_cutpoint: Utilized to ensure
-    proposed fragmentation points are valid based on domain boundaries and protein.
-  - A.fragmentation_methods.merge_overlapping_domains: Used to merge
-    overlapping domains within a protein.
+  - .fragmentation_methods._is_valid_cutpoint: Utilized to ensure proposed
+    fragmentation points are valid based on merged domain boundaries and protein.
+  - .fragmentation_methods._merge_domain_bounds: Used to find the start and
+    end positions of overlapping domains merged together.
 """
 
 from .classes import ProteinSubsection
-from .fragmentation_methods import validate_fragmentation_parameters, check_valid_cutpoint, merge_overlapping_domains
+from .fragmentation_methods import validate_fragmentation_parameters, _merge_domain_bounds, _is_valid_cutpoint
 
 def handle_long_domains(protein, min_len, max_len, overlap):
     """
@@ -85,60 +87,78 @@ def handle_long_domains(protein, min_len, max_len, overlap):
     # Validate the input parameters
     validate_fragmentation_parameters(protein, min_len, max_len, overlap)
 
+    return _handle_long_domains(protein, min_len, max_len, overlap)
+
+def _handle_long_domains(protein, min_len, max_len, overlap):
+    """
+    Implementation of handle_long_domains, without validating the input
+    parameters - for use by callers that have already validated them.
+    """
+    # Overlaps to try, from ideal up to max then back down to 0 - the same for
+    # every long domain, so only built once
+    overlap_order = (tuple(range(overlap['ideal'], overlap['max'] + 1)) +
+                     tuple(range(overlap['ideal'] - 1, - 1, -1)))
+
+    # Merge overlapping domains to simplify processing - only the merged start
+    # and end positions are needed, so no merged Domain objects are built
+    _, merged_starts, merged_ends = _merge_domain_bounds(protein.domain_list)
+    # Merged domains are sorted and don't overlap, so cutpoints can be checked
+    # by bisecting their start positions
+    domain_starts = merged_starts.tolist()
+    domain_ends = merged_ends.tolist()
+
     # Nested function for adjusting adding overlap around long domains
     def add_overlap(position, direction):
-        for adjusted_overlap in (list(range(overlap['ideal'], overlap['max'] + 1)) +
-                                 list(range(overlap['ideal'] - 1, - 1, -1))):
+        for adjusted_overlap in overlap_order:
             adjusted_position = position + (direction * adjusted_overlap)
-            if check_valid_cutpoint(adjusted_position, protein.domain_list, protein.last_res):
+            if _is_valid_cutpoint(adjusted_position, domain_starts, domain_ends, protein.last_res):
                 return adjusted_position
         return position  # Return original if no adjustment is valid (should never be used as overlap will be reduced to 0 which will return original anyway)
 
-    long_domain_list = []
     subsections = []
     fragments = []
 
-    # Merge overlapping domains to simplify processing
-    combined_domains = merge_overlapping_domains(protein.domain_list)
+    # Find long domains with a single comparison over all domain lengths
+    is_long = merged_ends - merged_starts + 1 >= max_len
+    long_starts = merged_starts[is_long].tolist()
+    long_ends = merged_ends[is_long].tolist()
 
     prev_end = 0
-    for domain in combined_domains:
-        domain_len = domain.end - domain.start + 1
-        if domain_len >= max_len:
-            long_domain_list.append(domain)
 
     # Process each long domain
-    for long_domain in long_domain_list:
+    for i, (domain_start, domain_end) in enumerate(zip(long_starts, long_ends)):
         # Check distances to protein ends
-        distance_to_start = long_domain.start
-        distance_to_end = protein.last_res - long_domain.end
+        distance_to_start = domain_start
+        distance_to_end = protein.last_res - domain_end
 
         # Determine if the long domain should be extended to the start or end of the protein
         should_merge_start = distance_to_start < min_len
         should_merge_end = distance_to_end < min_len
 
-        start = protein.first_res if should_merge_start else long_domain.start
-        end = protein.last_res if should_merge_end else long_domain.end
-
-        # Check for distance to other long domains
-        long_domain_len = long_domain.end - long_domain.start + 1
-        for other_domain in long_domain_list:
-            other_domain_len = other_domain.end - other_domain.start + 1
-            if other_domain == long_domain:
-                continue
-            if (long_domain.end < other_domain.start) and (other_domain.start - long_domain.end - 1  < min_len):
-                if long_domain_len <= other_domain_len:
-                    end = max(end, other_domain.start)
-            if (long_domain.start > other_domain.end) and (long_domain.start - other_domain.end - 1 < min_len):
-                if long_domain_len < other_domain_len:
-                    start = min(start, other_domain.end)
+        start = protein.first_res if should_merge_start else domain_start
+        end = protein.last_res if should_merge_end else domain_end
+
+        # Check for distance to neighbouring long domains - long domains are
+        # sorted and don't overlap, and any other long domain is further away
+        # than a neighbour that is itself at least max_len (so min_len) long
+        long_domain_len = domain_end - domain_start + 1
+        if i + 1 < len(long_starts):
+            next_start, next_end = long_starts[i + 1], long_ends[i + 1]
+            if next_start - domain_end - 1 < min_len:
+                if long_domain_len <= next_end - next_start + 1:
+                    end = max(end, next_start)
+        if i > 0:
+            previous_start, previous_end = long_starts[i - 1], long_ends[i - 1]
+            if domain_start - previous_end - 1 < min_len:
+                if long_domain_len < previous_end - previous_start + 1:
+                    start = min(start, previous_end)
 
         # Create subsection for sequence between end of previous long domain and
         # start of current one
         # Subsections are inclusive of both start and end
         if prev_end < (start - 1):
             subsection_sequence_start = prev_end + 1
-            subsection_sequence_end = long_domain.start - 1
+            subsection_sequence_end = domain_start - 1
             subsections.append(ProteinSubsection(protein,
                                                  subsection_sequence_start,
                                                  subsection_sequence_end))
@@ -6,19 +6,46 @@ Functions:
   - plot_fragment: Plots a rectangle representing a single protein fragment
   - draw_label: Adds a label to the plot
   - calculate_tick_freq: Calculates the frequency of x axis ticks based on sequence length
+  - _label_types: Normalizes the domain types to be labelled into a set
+  - _downsample_domains: Merges domains of the same type that fall within the
+    same pixel column of the plot
   - plot_fragmentation_output: Creates and optionally saves a visualization of
     protein domains and fragments
 
 Dependencies:
-  - itertools: Used for cycling through colors for the protein domains.
+  - functools: Used to cache tick frequencies between plots.
+  - math: Used to find the number of digits when calculating tick frequency.
   - os: Used for creating directories if they do not exist.
-  - matplotlib: Used for plotting the protein domains and fragments.
+  - matplotlib: Used for plotting the protein domains and fragments, with the
+    Agg backend used directly for figures that are only saved.
+  - numpy: Used to group domains drawn within the same pixel column.
+  - .classes.Domain: Used to represent merged domains when downsampling.
+  - .fragmentation_methods._domains_to_soa: Used to get domain positions and
+    types as arrays.
 """
 
-import itertools
+import math
 import os
+from functools import lru_cache
 import matplotlib.pyplot as plt
 from matplotlib import patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PolyCollection
+import numpy as np
+
+from .classes import Domain
+from .fragmentation_methods import _domains_to_soa
+
+# Domain colors used when coloring by domain type, defined once rather than
+# for every domain plotted
+_TYPE_COLORS = {'AF': 'orange', 'UniProt': 'green', 'manually_defined': 'blue'}
+_DEFAULT_COLOR = 'gray'
+# Domain colors used in turn when cycling colors
+_CYCLE_COLORS = ('skyblue', 'pink', 'cyan', 'gold', 'purple', 'silver', 'tan')
+
+# Multiple of 10**(digit count - 2) used as the tick frequency, by leading digit
+_TICK_MULTIPLIERS = (None, 1, 5, 5, 5, 10, 10, 10, 10, 10)
 
 def plot_domain(ax, domain, base_y_position, domain_height, domain_color_cycle, color_mode='type'):
     """
@@ -40,26 +67,91 @@ def plot_domain(ax, domain, base_y_position, domain_height, domain_color_cycle,
       - This function adds to the provided axis but does not show it. The display
         is managed by the caller.
     """
+    ax.add_patch(_domain_rectangle(domain, base_y_position, domain_height,
+                                   domain_color_cycle, color_mode))
+
+def _domain_rectangle(domain, base_y_position, domain_height, domain_color_cycle, color_mode):
+    """
+    Creates the rectangle representing a single protein domain, without adding
+    it to an axis - see plot_domain for parameters.
+
+    Returns:
+      - matplotlib.patches.Rectangle: The domain rectangle.
+    """
+    color = _domain_color(domain, domain_color_cycle, color_mode)
+    return patches.Rectangle((domain.start+0.5, base_y_position - domain_height / 2),
+                             domain.end-domain.start+1,
+                             domain_height,
+                             edgecolor='none',
+                             facecolor=color,
+                             alpha=0.5)
+
+def _domain_color(domain, domain_color_cycle, color_mode):
+    """
+    Chooses the color of a single protein domain - see plot_domain for parameters.
+
+    Returns:
+      - str: The domain color.
+    """
     if color_mode not in ['type', 'cycle']:
         raise ValueError("color_mode must be 'type' or 'cycle'")
-    type_colors = {'AF': 'orange', 'UniProt': 'green', 'manually_defined': 'blue'}
-    default_color = 'gray'
     if color_mode == 'type':
-        if domain.type in type_colors:
-            color = type_colors[domain.type]
+        if domain.type in _TYPE_COLORS:
+            color = _TYPE_COLORS[domain.type]
         else:
-            print(f"Domain type {domain.type} not in type_colours. Used default color {default_color} instead.")
-            color = default_color
+            print(f"Domain type {domain.type} not in type_colours. Used default color {_DEFAULT_COLOR} instead.")
+            color = _DEFAULT_COLOR
     elif color_mode == 'cycle':
         color = next(domain_color_cycle)
+    return color
 
-    rect = patches.Rectangle((domain.start+0.5, base_y_position - domain_height / 2),
-                             domain.end-domain.start+1,
-                             domain_height,
-                             edgecolor='none',
-                             facecolor=color,
-                             alpha=0.5)
-    ax.add_patch(rect)
+def _domain_colors(domain_types, color_mode):
+    """
+    Chooses the colors of many protein domains at once, deciding how to color
+    them once rather than for each domain.
+
+    Parameters:
+      - domain_types (list of str): The type of each domain, in plotting order.
+      - color_mode (str): 'cycle' for cycling colors or 'type' for color based on domain type.
+
+    Returns:
+      - list of str: The color of each domain.
+    """
+    if color_mode == 'type':
+        # Each distinct type only needs looking up once
+        type_colors = {}
+        for domain_type in dict.fromkeys(domain_types):
+            if domain_type in _TYPE_COLORS:
+                type_colors[domain_type] = _TYPE_COLORS[domain_type]
+            else:
+                print(f"Domain type {domain_type} not in type_colours. Used default color {_DEFAULT_COLOR} instead.")
+                type_colors[domain_type] = _DEFAULT_COLOR
+        return [type_colors[domain_type] for domain_type in domain_types]
+    if color_mode == 'cycle':
+        return [_CYCLE_COLORS[i % len(_CYCLE_COLORS)] for i in range(len(domain_types))]
+    raise ValueError("color_mode must be 'type' or 'cycle'")
+
+def _rectangle_verts(lefts, bottoms, widths, heights):
+    """
+    Builds the corner vertices of many rectangles at once, for drawing as a
+    single PolyCollection.
+
+    Parameters:
+      - lefts, bottoms, widths, heights (numpy.ndarray or float): The position
+        and size of each rectangle, broadcast to a common length.
+
+    Returns:
+      - numpy.ndarray: Of shape (N, 4, 2), the corners of each rectangle in
+        anticlockwise order from the bottom left.
+    """
+    lefts, bottoms, widths, heights = np.broadcast_arrays(lefts, bottoms, widths, heights)
+    # Fill a single preallocated array, rather than stacking temporary arrays
+    verts = np.empty((len(lefts), 4, 2))
+    verts[:, [0, 3], 0] = lefts[:, None]
+    verts[:, [1, 2], 0] = (lefts + widths)[:, None]
+    verts[:, [0, 1], 1] = bottoms[:, None]
+    verts[:, [2, 3], 1] = (bottoms + heights)[:, None]
+    return verts
 
 def plot_fragment(ax, fragment, index, base_y_position, fragment_height, offset):
     """
@@ -82,16 +174,26 @@ def plot_fragment(ax, fragment, index, base_y_position, fragment_height, offset)
         is managed by the caller.
       - Adds 0.5 to either end of the fragment to center it on the residue position.
     """
+    ax.add_patch(_fragment_rectangle(fragment, index, base_y_position,
+                                     fragment_height, offset))
+
+def _fragment_rectangle(fragment, index, base_y_position, fragment_height, offset):
+    """
+    Creates the rectangle representing a single protein fragment, without adding
+    it to an axis - see plot_fragment for parameters.
+
+    Returns:
+      - matplotlib.patches.Rectangle: The fragment rectangle.
+    """
     start, end = fragment
     vertical_position = (base_y_position - (fragment_height / 2) +
                      (offset if index % 2 == 0 else -offset))
-    fragment_rect = patches.Rectangle((start + 0.5, vertical_position),
-                                      end - start,
-                                      fragment_height,
-                                      edgecolor='black',
-                                      facecolor='red',
-                                      linewidth=1)
-    ax.add_patch(fragment_rect)
+    return patches.Rectangle((start + 0.5, vertical_position),
+                             end - start,
+                             fragment_height,
+                             edgecolor='black',
+                             facecolor='red',
+                             linewidth=1)
 
 def draw_label(label, x_left, x_right, y, bracket_height, ax):
     """
@@ -113,9 +215,14 @@ def draw_label(label, x_left, x_right, y, bracket_height, ax):
     ax.plot([x_left, mid_x], [y, y - bracket_height], color='black', lw=1)
     ax.plot([x_right, mid_x], [y, y - bracket_height], color='black', lw=1)
 
-    text_y_position = y - bracket_height
-    ax.text((x_left + x_right) / 2, text_y_position, label, ha='center',
-            va='top', fontsize=8, rotation=45)
+    _draw_label_text(label, mid_x, y - bracket_height, ax)
+
+def _draw_label_text(label, x, y, ax):
+    """
+    Adds the text of a bracket label at the point of the bracket - see
+    draw_label for parameters.
+    """
+    ax.text(x, y, label, ha='center', va='top', fontsize=8, rotation=45)
 
 def calculate_tick_freq(n):
     """
@@ -130,31 +237,90 @@ def calculate_tick_freq(n):
     # Check if the number is a positive integer
     if not isinstance(n, int) or n <= 0:
         raise ValueError("Input must be a positive integer")
+    return _tick_freq(n)
 
-    # Convert integer to string to easily access and count digits
-    n_str = str(n)
-    digit_count = len(n_str)  # Count the number of digits
-    leading_digit = int(n_str[0])  # Get the leading digit
-
+@lru_cache(maxsize=None)
+def _tick_freq(n):
+    """
+    Cached implementation of calculate_tick_freq, for an already validated
+    positive integer - so that plotting many proteins of similar length reuses
+    the result.
+    """
     # Special case for single digit numbers
-    if digit_count == 1:
+    if n < 10:
         return 1
 
-    # Apply conditions based on the leading digit and number length
-    if leading_digit == 1:
-        return 10 ** (digit_count - 2)
-    if leading_digit in {5, 6, 7, 8, 9}:
-        return 10 ** (digit_count - 1)
-    if leading_digit in {2, 3, 4}:
-        return 5*10 ** (digit_count - 2)
-    raise ValueError("Unexpected leading digit")
+    # Power of ten of the leading digit - log10 can round up for numbers just
+    # below a power of ten, so correct it with exact integer comparisons
+    magnitude = int(math.log10(n))
+    if 10 ** magnitude > n:
+        magnitude -= 1
+    elif 10 ** (magnitude + 1) <= n:
+        magnitude += 1
+    leading_digit = n // 10 ** magnitude
+
+    # Leading digit 1 gives ticks every 10**(magnitude-1), 2-4 every
+    # 5*10**(magnitude-1), and 5-9 every 10**magnitude
+    return _TICK_MULTIPLIERS[leading_digit] * 10 ** (magnitude - 1)
+
+def _label_types(label):
+    """
+    Normalizes the label argument of plot_fragmentation_output into a set of
+    domain types to label, so that each domain type is checked against a set.
+
+    Parameters:
+      - label (list, str or None): Domain type(s) to be labelled.
+
+    Returns:
+      - frozenset: The domain types to label - empty if label is None or empty.
+    """
+    if not label:
+        return frozenset()
+    # A single type given as a string is one type, not a collection of characters
+    if isinstance(label, str):
+        return frozenset((label,))
+    return frozenset(label)
+
+def _downsample_domains(domains, px_width, last_res):
+    """
+    Merges domains that would be drawn within the same pixel column of the plot,
+    so that the number of rectangles drawn is limited by the plot width rather
+    than by the number of domains. Only consecutive domains (ordered by start)
+    of the same type are merged, so colors by type are unaffected.
+
+    Parameters:
+      - domains (list of Domain): The domains to be plotted.
+      - px_width (int): The width of the plot in pixels.
+      - last_res (int): The last residue position in the protein sequence.
+
+    Returns:
+      - list of Domain: Domains sorted by start, with each group of merged domains
+        replaced by a single domain spanning from the first start to the
+        furthest end in the group, keeping the id and type of the first.
+    """
+    domains = sorted(domains, key=lambda domain: domain.start)
+    starts, ends, ids, types = _domains_to_soa(domains)
+    if not domains:
+        return domains
+
+    # Pixel column of each domain start, over the plotted range of residues
+    columns = starts * px_width // (last_res + 1)
+    types = np.array(types, dtype=object)
+    group_firsts = np.flatnonzero(np.concatenate(
+        ([True], (columns[1:] != columns[:-1]) | (types[1:] != types[:-1]))))
+    group_ends = np.maximum.reduceat(ends, group_firsts)
+
+    return [Domain(ids[first], int(starts[first]), end, types[first])
+            for first, end in zip(group_firsts.tolist(), group_ends.tolist())]
 
 def plot_fragmentation_output(protein, fragments, save_location=None,
-                              figsize=(12, 4), color_mode='type', label=None):
+                              figsize=(12, 4), color_mode='type', label=None, ax=None,
+                              rasterize=False):
     """
     Creates and optionally saves a visualization of protein domains and fragments.
     Domains are plotted as colored rectangles, and fragments as red
-    rectangles with a vertical offset so they can be distinguished. 
+    rectangles with a vertical offset so they can be distinguished. Domains and
+    fragments are each drawn as a single collection.
     The resulting plot can be saved to a file by specifiying a save location.
 
     Parameters:
@@ -169,7 +335,14 @@ def plot_fragmentation_output(protein, fragments, save_location=None,
         UniProt, manually defined), or using a series of colours to distinguish
         nearby domains
       - label (list, optional): List of sources for which domains should be labelled.
-        Can include 'UniProt', 'AF' and 'manually_defined'. Defaults to None.
+        Can include 'UniProt', 'AF' and 'manually_defined', or be a single one of
+        these as a string. Defaults to None.
+      - ax (matplotlib.axes.Axes, optional): An existing axis to plot on, instead
+        of creating a new figure - in which case figsize is not used. Defaults
+        to None.
+      - rasterize (bool, optional): Whether to rasterize the domains and fragments
+        when the figure is saved in a vector format (such as PDF or SVG), to keep
+        files small for proteins with many domains or fragments. Defaults to False.
 
 
     Returns:
@@ -178,31 +351,88 @@ def plot_fragmentation_output(protein, fragments, save_location=None,
     Note:
       - If `save_location` is provided and the directory does not exist, it will
         be created.
+      - If the plot is saved and no ax is provided, the figure is created
+        without pyplot and rendered with the Agg backend, so it is returned but
+        will not be displayed by plt.show().
+      - To plot many proteins without creating a figure for each, pass the same
+        ax each time and call ax.clear() between proteins.
+      - If there are more domains than pixels across the plot, domains of the
+        same type that fall within the same pixel column are drawn as one.
       - x-axis represents the protein sequence position, with 1-based indexing.
     """
 
-    fig, ax = plt.subplots(figsize=figsize)
+    if ax is not None:
+        fig = ax.figure
+    elif save_location:
+        # Figures that are only saved don't need pyplot, so are drawn directly
+        # with Agg and never kept open in pyplot when plotting many proteins
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+    else:
+        fig, ax = plt.subplots(figsize=figsize)
     base_y_position = 0.55
     domain_height = 0.4
     fragment_height = 0.05
     offset = 0.025  # Vertical offset for fragments
-    domain_color_cycle = itertools.cycle(['skyblue', 'pink', 'cyan', 'gold',
-                                     'purple', 'silver', 'tan'])
-
-    for domain in protein.domain_list:
-        plot_domain(ax, domain, base_y_position, domain_height, domain_color_cycle, color_mode)
-
-        if label and domain.type in label:
-            # Draw label
-            bracket_height = 0.05
-            draw_label(domain.id, domain.start+0.5, domain.end+1.5,
-                       base_y_position - domain_height / 2,
-                       bracket_height, ax)
 
-    for index, fragment in enumerate(fragments):
-        plot_fragment(ax, fragment, index, base_y_position, fragment_height, offset)
+    # Domains and fragments are each added to the axis as a single collection,
+    # rather than as one patch per domain or fragment.
+    # Domains narrower than a pixel can't be distinguished, so when there are
+    # more domains than pixels, nearby domains of the same type are drawn as one
+    domains_to_draw = protein.domain_list
+    px_width = int(fig.get_figwidth() * fig.dpi)
+    if len(domains_to_draw) > px_width:
+        domains_to_draw = _downsample_domains(domains_to_draw, px_width, protein.last_res)
+
+    # Domain rectangles are built from arrays of their positions, rather than as
+    # one Rectangle object per domain
+    domain_starts, domain_ends, _, domain_types = _domains_to_soa(domains_to_draw)
+    domain_colors = _domain_colors(domain_types, color_mode)
+    domain_verts = _rectangle_verts(domain_starts + 0.5, base_y_position - domain_height / 2,
+                                    domain_ends - domain_starts + 1, domain_height)
+
+    label_types = _label_types(label)
+    labelled_domains = ([domain for domain in protein.domain_list if domain.type in label_types]
+                        if label_types else [])
+    if labelled_domains:
+        # Draw labels for domains of the requested types, as in draw_label but
+        # with the bracket lines of all labels added as a single collection
+        bracket_height = 0.05
+        label_y_position = base_y_position - domain_height / 2
+        label_starts, label_ends, label_ids, _ = _domains_to_soa(labelled_domains)
+        x_lefts = label_starts + 0.5
+        x_rights = label_ends + 1.5
+        mid_xs = (x_lefts + x_rights) / 2
+        bracket_points = np.stack([np.stack([x_lefts, np.full_like(x_lefts, label_y_position)], axis=-1),
+                                   np.stack([mid_xs, np.full_like(mid_xs, label_y_position - bracket_height)], axis=-1),
+                                   np.stack([x_rights, np.full_like(x_rights, label_y_position)], axis=-1)],
+                                  axis=1)
+        # Each bracket is a line from its left end to the point and one from
+        # its right end to the point
+        ax.add_collection(LineCollection(np.concatenate((bracket_points[:, [0, 1]],
+                                                         bracket_points[:, [2, 1]])),
+                                         colors='black', linewidths=1, capstyle='projecting'))
+        for label_id, mid_x in zip(label_ids, mid_xs.tolist()):
+            _draw_label_text(label_id, mid_x, label_y_position - bracket_height, ax)
+
+    # Fragments alternate between being offset up and down, starting with up
+    fragment_array = np.array(fragments, dtype=float).reshape(-1, 2)
+    fragment_offsets = np.where(np.arange(len(fragment_array)) % 2 == 0, offset, -offset)
+    fragment_verts = _rectangle_verts(fragment_array[:, 0] + 0.5,
+                                      base_y_position - fragment_height / 2 + fragment_offsets,
+                                      fragment_array[:, 1] - fragment_array[:, 0],
+                                      fragment_height)
+
+    if domain_colors:
+        ax.add_collection(PolyCollection(domain_verts, facecolors=domain_colors,
+                                         edgecolors='none', alpha=0.5,
+                                         rasterized=rasterize))
+    if len(fragment_verts):
+        ax.add_collection(PolyCollection(fragment_verts, facecolors='red',
+                                         edgecolors='black', linewidths=1,
+                                         rasterized=rasterize))
 
-    ax.set_xlim(0, protein.last_res + 2)
     ax.set_ylim(0, 0.8)
     ax.set_xlabel('Protein Sequence Position')
     # Setting the X-axis
@@ -210,19 +440,24 @@ def plot_fragmentation_output(protein, fragments, save_location=None,
 
     # Setting ticks
     tick_freq = calculate_tick_freq(protein.last_res)
-    ticks = list(range(0, protein.last_res + 1, tick_freq))  # Shift by 1 for 1-based index
-    ticks.remove(0)
-    ticks.append(1)
-    ticks.append(protein.last_res + 1)
+    # Ticks at each multiple of tick_freq, plus the first and last positions
+    # (np.unique also sorts, and removes a repeated 1 when tick_freq is 1)
+    ticks = np.unique(np.concatenate(([1], np.arange(tick_freq, protein.last_res + 1, tick_freq),
+                                      [protein.last_res + 1])))
+    # Drop the last multiple of tick_freq if it is too close to the final tick
+    # for their labels not to overlap
+    if len(ticks) > 2 and ticks[-1] - ticks[-2] < tick_freq / 3:
+        ticks = np.delete(ticks, -2)
     ax.set_xticks(ticks)
-    ax.set_xticklabels([str(tick) for tick in ticks])
+    ax.set_xticklabels(ticks.astype(str))
 
     ax.set_yticks([])
     ax.set_title(f'Protein Domains and Fragments in {protein.name}')
 
     if save_location:
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-        fig.savefig(f"{save_location}/{protein.name}fragments.png", bbox_inches='tight')
+        # exist_ok avoids a separate existence check, which could race with
+        # other processes creating the same directory
+        os.makedirs(save_location, exist_ok=True)
+        fig.savefig(os.path.join(save_location, f"{protein.name}fragments.png"), bbox_inches='tight')
 
     return fig
@@ -13,20 +13,27 @@ Functions:
 
 Dependencies:
   - pandas: For reading and processing the CSV file.
+  - json: For quickly parsing domain data written in JSON format.
   - ast.literal_eval: For safely evaluating string literals containing Python
     expressions.
   - collections.Counter: For checking column names are not duplicated.
+  - concurrent.futures.ThreadPoolExecutor: For fetching protein data from
+    UniProt concurrently.
   - .classes.Protein: The Protein class for representing protein data.
   - .classes.Domain: The Domain class for representing protein domains.
+  - .uniprot_fetch.fetch_uniprot_info_batch: For fetching protein data from
+    UniProt for many proteins at once.
   - .uniprot_fetch.fetch_uniprot_info: For fetching protein data from UniProt.
 """
+import json
 from ast import literal_eval
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from .classes import Protein, Domain
-from .uniprot_fetch import fetch_uniprot_info
+from .uniprot_fetch import fetch_uniprot_info, fetch_uniprot_info_batch
 
-def initialize_proteins_from_csv(csv_path):
+def initialize_proteins_from_csv(csv_path, max_workers=8, cache_dir=None):
     """
     Reads a CSV file with columns for protein names and accession IDs, and
     initializes a list of Protein objects. Fetches protein sequences from
@@ -39,13 +46,20 @@ def initialize_proteins_from_csv(csv_path):
 
     Parameters:
       - csv_path (str): The path to the CSV file.
+      - max_workers (int, optional): The maximum number of UniProt requests to
+        make at once. Defaults to 8.
+      - cache_dir (str, optional): Directory in which to cache data fetched from
+        UniProt, so that later runs using the same directory don't fetch it
+        again. Defaults to None (no caching).
 
     Returns:
-      - tuple of (list of Protein, list of str): 
+      - tuple of (list of Protein, pandas.DataFrame):
           - The first element is a list of initialized Protein objects for which
             sequences were successfully fetched.
-          - The second element is a list of protein names for which sequences
-            could not be retrieved or other errors occurred during fetching.
+          - The second element is the DataFrame read from the CSV file, with
+            normalized column names. Every column is read as text (str, with
+            empty cells as NaN) - numeric columns are returned as strings, not
+            numbers.
 
     Errors and Exceptions:
       - Raises ValueError if required columns ('name', 'accession_id') are not
@@ -66,9 +80,17 @@ def initialize_proteins_from_csv(csv_path):
         sequence data is found in UniProt. If a sequence is found in UniProt, the
         'sequence' column will be ignored (and overwritten if the
         update_csv_with_fragments function is used).
+      - All columns are read as text, so values in other columns (eg IDs with
+        leading zeros) are kept exactly as written. This changes the returned
+        DataFrame from earlier versions, where pandas inferred column types -
+        convert any numeric columns needed (eg with pandas.to_numeric).
+      - Sequences are fetched from UniProt in batches of accession IDs, with each
+        distinct accession ID fetched once, and proteins are returned in CSV
+        order. Accession IDs not found in the batches are fetched individually.
     """
-    # Read the CSV file
-    df = pd.read_csv(csv_path)
+    # Read the CSV file, with every column read as text - skips type inference,
+    # and keeps values exactly as written in the output csv
+    df = pd.read_csv(csv_path, dtype=str)
 
     # Normalize column names
     df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
@@ -89,21 +111,40 @@ def initialize_proteins_from_csv(csv_path):
     proteins = []  # List to store successfully initialized Protein objects
     proteins_with_errors = []  # List to store protein names with no UniProt data available
 
-    # Iterate through each row in the DataFrame
-    for _, row in df.iterrows():
-        protein_name = row.get('name', '').strip()
+    # Read the name, accession ID and manual sequence of each entry, cleaning
+    # whole columns at once rather than row by row
+    def clean_column(column):
+        if column not in df.columns:
+            return [''] * len(df)
+        return df[column].fillna('').astype(str).str.strip().tolist()
+
+    entries = []
+    for protein_name, accession_id, manual_sequence in zip(
+            clean_column('name'), clean_column('accession_id'), clean_column('sequence')):
         # Ensure each entry has a name; skip entries without a name
         if not protein_name:
             print("Missing protein name; skipping entry.")
             continue
-        accession_id = row.get('accession_id', '')
-        accession_id = '' if pd.isna(accession_id) else accession_id.strip()
-        manual_sequence = row.get('sequence', '')
-        manual_sequence = '' if pd.isna(manual_sequence) else manual_sequence.strip()
-
+        entries.append((protein_name, accession_id, manual_sequence))
+
+    # Fetch data from UniProt for each distinct accession ID, in batches
+    accession_ids = list(dict.fromkeys(accession_id for _, accession_id, _ in entries))
+    fetch_results = fetch_uniprot_info_batch(accession_ids, max_workers=max_workers,
+                                             cache_dir=cache_dir)
+    # Accession IDs missing from the batches (eg placeholders, or secondary or
+    # invalid accessions) are fetched individually and concurrently, as each
+    # fetch mostly waits on the network
+    missing_ids = [accession_id for accession_id in accession_ids
+                   if accession_id not in fetch_results]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetch_results.update(zip(missing_ids, executor.map(
+            lambda accession_id: fetch_uniprot_info(accession_id, cache_dir=cache_dir),
+            missing_ids)))
+
+    for protein_name, accession_id, manual_sequence in entries:
         sequence = ''
-        # Attempt to fetch sequence
-        fetch_result = fetch_uniprot_info(accession_id)
+        # Attempt to use fetched sequence
+        fetch_result = fetch_results[accession_id]
         if fetch_result and 'sequence' in fetch_result:
             sequence = fetch_result['sequence']
         elif manual_sequence:  # Use manually provided sequence if fetch fails
@@ -147,6 +188,8 @@ def find_user_specified_domains(protein_name, df):
     Notes:
       - Domains are expected to be provided using 1-based indexing but will be
         processed and output with 0-based indexing.
+      - Domain data can be written as Python literals (eg [(1, 10), (20, 30)])
+        or in JSON format (eg [[1, 10], [20, 30]] or {"name1": [1, 10]}).
     """
     def create_domain(identifier, start, end):
         """ Helper to create a Domain object, converting from 1-based to 0-based indexing."""
@@ -162,25 +205,30 @@ def find_user_specified_domains(protein_name, df):
         missing_cols = [col for col in ['name', 'domains'] if col not in df.columns]
         raise ValueError(f"Missing columns in dataframe: {', '.join(missing_cols)}")
 
-    # Filter DataFrame for the specified protein
-    protein_domains = df[df['name'] == protein_name]
+    # Select the domains of the specified protein, without copying other columns
+    protein_domains = df.loc[df['name'] == protein_name, 'domains']
     # Return empty list if protein is not found
     if protein_domains.empty:
         print(f"No user-specified domains found for protein {protein_name}.")
         return []
 
     # Return empty list if protein is found but has no associated domains
-    domain_data = protein_domains['domains'].iloc[0]
+    domain_data = protein_domains.iloc[0]
     if not domain_data:
         print(f"No user-specified domains found for protein {protein_name}.")
         return []
 
-    # Validate and parse domain data if it's a string representation of a list
+    # Validate and parse domain data if it's a string representation of a list.
+    # Data in JSON format (eg [[1, 10], [20, 30]]) is parsed directly, which is
+    # much faster than literal_eval, which is used for Python literals (eg tuples)
     if isinstance(domain_data, str):
         try:
-            domain_data = literal_eval(domain_data)
-        except (SyntaxError, ValueError) as e:
-            raise ValueError(f"Error parsing domain data: {str(e)}") from e
+            domain_data = json.loads(domain_data)
+        except ValueError:
+            try:
+                domain_data = literal_eval(domain_data)
+            except (SyntaxError, ValueError) as e:
+                raise ValueError(f"Error parsing domain data: {str(e)}") from e
 
     domains = []
     # Create Domain objects from the domain data (list of tuples or dictionary)
@@ -221,45 +269,57 @@ def update_csv_with_fragments(df, output_csv, proteins):
       - Fragments in output are referenced using 1-based indexing and inclusive
         of the start and end residues.
     """
-    # Create a copy of the DataFrame to avoid modifying the original
-    df_copy = df.copy()
-
-    # Prepare dictionaries for mapping protein names to their updated attributes
-    sequences_dict = {protein.name: protein.sequence for protein in proteins}
-    domains_dict = {
-        protein.name: ', '.join([f"{domain.id}: {domain.start+1}-{domain.end+1}"
-                                 for domain in protein.domain_list])
-        if protein.domain_list else ''
-        for protein in proteins
-    }
-    fragments_dict = {
-        protein.name: [(start + 1, end) for start, end in protein.fragment_list]
-        for protein in proteins
-    }
-    fragments_sequence_dict = {
-        protein.name: [protein.sequence[start:end] for start, end in protein.fragment_list]
-        for protein in proteins
-    }
-
-    # Update the DataFrame copy with the new sequences, domains, and fragment information
-    df_copy['sequence'] = df['name'].map(sequences_dict)
-    df_copy['domains'] = df['name'].map(domains_dict)
-    df_copy['fragment_indices'] = df['name'].map(fragments_dict)
-    df_copy['fragment_sequences'] = df['name'].map(fragments_sequence_dict)
+    # Build a table of the updated attributes for each protein, indexed by name,
+    # and join it to the protein names in one pass. As with a dict, the last
+    # protein with a given name is used, and rows for names with no protein get NaN
+    new_columns = ['sequence', 'domains', 'fragment_indices', 'fragment_sequences']
+    updates = pd.DataFrame(
+        [(protein.sequence, _format_domains(protein),
+          *_format_fragments(protein))
+         for protein in proteins],
+        index=[protein.name for protein in proteins], columns=new_columns, dtype=object)
+    updates = updates[~updates.index.duplicated(keep='last')]
+    matched_updates = updates.reindex(df['name'])
 
     # Define desired column order, adding other columns dynamically
     desired_columns = ['name', 'accession_id', 'sequence', 'domains',
                        'fragment_indices', 'fragment_sequences']
-    existing_columns = df_copy.columns.tolist()
+    existing_columns = df.columns.tolist() + [col for col in new_columns if col not in df.columns]
     additional_columns = [col for col in existing_columns if col not in desired_columns]
     final_columns_order = ([col for col in desired_columns if col in existing_columns]
                            + additional_columns)
 
-    # Reorder the DataFrame columns
-    new_df = df_copy.reindex(columns=final_columns_order)
+    # Build the new DataFrame directly in the final column order, from the new
+    # sequences, domains, and fragment information and the original columns -
+    # rather than copying the whole DataFrame, updating it and then reordering it
+    new_df = pd.DataFrame(
+        {col: matched_updates[col].to_numpy() if col in new_columns else df[col].array
+         for col in final_columns_order},
+        index=df.index)
     # Save the updated DataFrame to the new CSV file
     new_df.to_csv(output_csv, index=False)
     print(f"CSV file has been updated and saved to {output_csv}")
 
     # Return the newly organized DataFrame
     return new_df
+
+def _format_domains(protein):
+    """
+    Formats the domains of a protein for the output csv, as comma separated
+    'id: start-end' entries using 1-based indexing.
+    """
+    if not protein.domain_list:
+        return ''
+    return ', '.join([f"{domain.id}: {domain.start+1}-{domain.end+1}"
+                      for domain in protein.domain_list])
+
+def _format_fragments(protein):
+    """
+    Formats the fragments of a protein for the output csv, as a list of
+    (start, end) indices using 1-based indexing and a list of fragment
+    sequences. The fragment arrays are read once, rather than building
+    fragment_list for each column.
+    """
+    fragments = list(zip(protein.fragment_starts.tolist(), protein.fragment_ends.tolist()))
+    return ([(start + 1, end) for start, end in fragments],
+            [protein.sequence[start:end] for start, end in fragments])
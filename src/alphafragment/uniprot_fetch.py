@@ -5,19 +5,55 @@ information from the UniProt database.
 Functions:
   - fetch_uniprot_info(accession_id): Fetches information for a given protein
     accession code from the UniProt database.
+  - fetch_uniprot_info_batch(accession_ids): Fetches information for many
+    protein accession codes from the UniProt database, in batches.
   - fetch_uniprot_domains(protein): Identifies and returns the domains of a
     protein based on the fetched UniProt data
 
 Dependencies: 
   - requests: Required for making HTTP requests to the UniProt API.
+  - urllib3.util.retry.Retry: Used to retry requests that fail due to rate
+    limiting or server errors.
+  - threading: Used to keep a separate requests session for each thread.
+  - concurrent.futures.ThreadPoolExecutor: Used to fetch batches concurrently.
+  - json, os: Used to cache fetched data on disk.
   - .classes: Contains the Domain class used to represent protein
     domains.
 """
 
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .classes import Domain
 
-def fetch_uniprot_info(accession_id):
+# Sessions are not guaranteed to be thread-safe, so each thread fetching from
+# UniProt keeps its own, reusing connections between requests
+_thread_local = threading.local()
+
+def _uniprot_session():
+    """
+    Returns the requests session for the current thread, creating it if needed.
+    Requests made with the session are retried up to 3 times with exponential
+    backoff (or after the delay requested by the server) if UniProt responds
+    that it is rate limiting requests (429) or has a server error (5xx).
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        # Only responses are retried - connection and read errors are reported
+        # straight away, as before
+        retries = Retry(total=3, connect=0, read=0, backoff_factor=1,
+                        status_forcelist=(429, 500, 502, 503, 504),
+                        raise_on_status=False)
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(max_retries=retries))
+        _thread_local.session = session
+    return session
+
+def fetch_uniprot_info(accession_id, cache_dir=None):
     """
     Fetches and returns protein information from the UniProt database for
     a given accession code.
@@ -26,6 +62,9 @@ def fetch_uniprot_info(accession_id):
       - accession_id (str): The accession id of the protein for which to fetch
         domain information. If 'na' or a similar placeholder is provided, the
         function will not attempt a request and will return None immediately.
+      - cache_dir (str, optional): Directory in which to cache fetched data, so
+        that it is read from disk rather than fetched again by later calls (and
+        later runs) using the same directory. Defaults to None (no caching).
 
     Returns:
       - dict or None: The JSON response as a dictionary if the request is
@@ -43,17 +82,26 @@ def fetch_uniprot_info(accession_id):
     Note:
       - This function requires the `requests` library to make HTTP requests.
       - A timeout is set to 30 seconds for the HTTP request to prevent hanging.
+      - Requests that fail due to rate limiting or server errors are retried up
+        to 3 times with exponential backoff before an error is reported.
+      - Safe to call from multiple threads at once.
     """
     # Check for non-applicable accession_id before attempting the request
     if not accession_id or accession_id.lower() == "na":
         print("No valid accession ID provided. Skipping UniProt fetch operation.")
         return None
 
+    cached = _read_cache(cache_dir, accession_id)
+    if cached is not None:
+        return cached
+
     request_url = f"https://www.ebi.ac.uk/proteins/api/features/{accession_id}"
     try:
-        response = requests.get(request_url, headers={"Accept": "application/json"}, timeout=30)
+        response = _uniprot_session().get(request_url, headers={"Accept": "application/json"}, timeout=30)
         response.raise_for_status()  # Raises an HTTPError for bad responses (4xx, 5xx)
-        return response.json()  # Parse and return JSON response
+        data = response.json()  # Parse JSON response
+        _write_cache(cache_dir, accession_id, data)
+        return data
     except requests.exceptions.HTTPError as e:
         # Specific handling for HTTP errors, like 404 or 500
         print(f"HTTP Error: Could not retrieve data for accession code "
@@ -67,7 +115,131 @@ def fetch_uniprot_info(accession_id):
               f"{accession_id}. Error message: {e}")
     return None
 
-def find_uniprot_domains(protein):
+def fetch_uniprot_info_batch(accession_ids, batch_size=100, max_workers=8, cache_dir=None):
+    """
+    Fetches protein information from the UniProt database for many accession
+    codes, making one request per batch of accession codes rather than one per
+    accession code.
+
+    Parameters:
+      - accession_ids (list of str): The accession ids of the proteins for which
+        to fetch information. Empty or 'na' placeholder ids are skipped.
+      - batch_size (int, optional): The maximum number of accession ids in each
+        request. Defaults to 100, the most UniProt accepts in one request.
+      - max_workers (int, optional): The maximum number of batches to request at
+        once. Defaults to 8.
+      - cache_dir (str, optional): Directory in which to cache fetched data, as
+        for fetch_uniprot_info - only accession ids not already cached are
+        requested. Defaults to None (no caching).
+
+    Returns:
+      - dict: Maps each accession id for which data was found to its data, in
+        the same format as returned by fetch_uniprot_info. Accession ids for
+        which no data was returned are not included.
+
+    Errors and Exceptions:
+      - If the request for a batch fails, an error message is printed, and none
+        of the accession ids in the batch are included in the result.
+
+    Note:
+      - UniProt returns entries under their primary accession code, so an id that
+        is not the primary accession of its entry (or is invalid) will not be
+        included - these can be fetched individually with fetch_uniprot_info.
+    """
+    valid_ids = list(dict.fromkeys(accession_id for accession_id in accession_ids
+                                   if accession_id and accession_id.lower() != "na"))
+
+    # Only request accession ids that aren't already cached
+    results = {}
+    for accession_id in valid_ids:
+        cached = _read_cache(cache_dir, accession_id)
+        if cached is not None:
+            results[accession_id] = cached
+    uncached_ids = [accession_id for accession_id in valid_ids if accession_id not in results]
+    batches = [uncached_ids[i:i + batch_size] for i in range(0, len(uncached_ids), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch, entries in zip(batches, executor.map(_fetch_uniprot_batch, batches)):
+            entries_by_accession = {str(entry.get('accession', '')).upper(): entry
+                                    for entry in entries}
+            for accession_id in batch:
+                if accession_id.upper() in entries_by_accession:
+                    results[accession_id] = entries_by_accession[accession_id.upper()]
+                    _write_cache(cache_dir, accession_id, results[accession_id])
+    return results
+
+def _cache_path(cache_dir, accession_id):
+    """
+    Returns the path of the cache file for an accession id, or None if the id
+    can't safely be used as a file name (so isn't cached).
+    """
+    if not accession_id.replace('-', '').replace('_', '').isalnum():
+        return None
+    return os.path.join(cache_dir, f"{accession_id.upper()}.json")
+
+def _read_cache(cache_dir, accession_id):
+    """
+    Returns the cached UniProt data for an accession id, or None if caching is
+    not in use or the data is not cached (or can't be read).
+    """
+    if cache_dir is None:
+        return None
+    path = _cache_path(cache_dir, accession_id)
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(cache_dir, accession_id, data):
+    """
+    Caches the UniProt data for an accession id, if caching is in use. The file
+    is written under a temporary name and then renamed, so that concurrent
+    readers never see a partly written file.
+    """
+    if cache_dir is None:
+        return
+    path = _cache_path(cache_dir, accession_id)
+    if path is None:
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(data, cache_file)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not cache UniProt data for {accession_id}. Error message: {e}")
+
+def _fetch_uniprot_batch(accession_ids):
+    """
+    Fetches the UniProt entries for a single batch of accession ids - see
+    fetch_uniprot_info_batch.
+
+    Returns:
+      - list of dict: The entries returned by UniProt, or an empty list if the
+        request fails.
+    """
+    request_url = "https://www.ebi.ac.uk/proteins/api/features"
+    try:
+        response = _uniprot_session().get(request_url,
+                                          params={"accession": ",".join(accession_ids),
+                                                  "size": len(accession_ids)},
+                                          headers={"Accept": "application/json"}, timeout=30)
+        response.raise_for_status()
+        entries = response.json()
+        if isinstance(entries, list):
+            return [entry for entry in entries if isinstance(entry, dict)]
+        print(f"Error: Unexpected response format when fetching data for "
+              f"{len(accession_ids)} accession codes.")
+    except requests.exceptions.RequestException as e:
+        print(f"Error: A problem occurred when trying to fetch data for "
+              f"{len(accession_ids)} accession codes. Error message: {e}")
+    return []
+
+def find_uniprot_domains(protein, cache_dir=None):
     """
     Extracts domain information for a given protein from UniProt data.
 
@@ -75,6 +247,8 @@ def find_uniprot_domains(protein):
       - protein (Protein): The protein object for which domain information is to
         be fetched. The object should have a valid 'accession_id' attribute that
         corresponds to its UniProt accession code.
+      - cache_dir (str, optional): Directory in which to cache fetched UniProt
+        data - see fetch_uniprot_info. Defaults to None (no caching).
 
     Returns:
       - list of Domain objects: A list containing Domain objects for each domain
@@ -100,7 +274,7 @@ def find_uniprot_domains(protein):
         can manually specify domains in the input CSV file used with other functions of
         this module.
     """
-    data = fetch_uniprot_info(protein.accession_id)
+    data = fetch_uniprot_info(protein.accession_id, cache_dir=cache_dir)
     uniprot_domains = []
 
     if data is None:
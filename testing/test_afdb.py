@@ -1,21 +1,36 @@
 """
 This test file contains tests for the alphafold_db_domain_identification module.
 """
+import numpy as np
 import pytest
+import requests
 import requests_mock
 from requests.exceptions import Timeout, ConnectionError as RequestsConnectionError
 from alphafragment.classes import Domain
 from alphafragment.alphafold_db_domain_identification import read_afdb_json, find_domain_by_res, find_domains_from_pae
 
-@pytest.fixture
-def mock_requests():
+@pytest.fixture(scope="module")
+def mock_requests_module():
     """
-    Provides a requests mocking fixture for use in test functions to simulate API
-    responses.
+    Installs a single requests mocker for the whole module, rather than
+    installing and removing one for every test.
     """
     with requests_mock.Mocker() as m:
         yield m
 
+@pytest.fixture
+def mock_requests(mock_requests_module):
+    """
+    Provides a requests mocking fixture for use in test functions to simulate API
+    responses. Responses registered by earlier tests and the request history are
+    cleared for each test, so a request to a URL the test hasn't registered fails.
+    """
+    # requests_mock has no public way to remove registered responses, so the
+    # matchers of the mocker's adapter are cleared directly
+    mock_requests_module._adapter._matchers.clear()
+    mock_requests_module.reset_mock()
+    return mock_requests_module
+
 @pytest.mark.parametrize("response, expected", [
     # Empty dictionary in a list
     ([{}], None),
@@ -66,6 +81,16 @@ def test_request_exceptions_handling(mock_requests, exception):
     result = read_afdb_json("valid_id", "v4")
     assert result is None, f"Expected None for exception {exception}, got {result}"
 
+def test_mock_requests_cleared_between_tests(mock_requests):
+    """
+    Tests that responses registered by earlier tests are not kept by the shared
+    mocker, so a request to a URL the current test hasn't registered fails.
+    """
+    mock_url = 'https://alphafold.ebi.ac.uk/files/AF-valid_id-F1-predicted_aligned_error_v4.json'
+    with pytest.raises(requests_mock.exceptions.NoMockAddress):
+        requests.get(mock_url, timeout=1)
+    assert mock_requests.call_count == 1, f"Expected only this test's request in the history, got {mock_requests.call_count}"
+
 @pytest.mark.parametrize("accession_id", [None, 'na', '', 'NA'])
 def test_read_afdb_json_with_invalid_accession_id(accession_id):
     """
@@ -100,7 +125,13 @@ def test_find_domain_by_res(domains, residue, expected):
     # PAE contains non-numeric values
     ([[1, 2], [3, 'a']], 'cautious', ValueError),
     # Invalid method
-    ([[1, 2], [3, 4]], 'invalid', ValueError)
+    ([[1, 2], [3, 4]], 'invalid', ValueError),
+    # PAE array that is not square
+    (np.zeros((3, 2)), 'cautious', ValueError),
+    # PAE array that is not numeric
+    (np.array([['1', '2'], ['3', 'a']]), 'cautious', ValueError),
+    # PAE array that is empty
+    (np.zeros((0, 0)), 'cautious', ValueError)
 ])
 def test_error_handling(pae, method, expected_exception):
     """
@@ -139,8 +170,9 @@ def test_handling_custom_parameters(custom_params, expected_exception):
 @pytest.mark.parametrize("pae, expected_length", [
     # A very small matrix
     ([[1]], 0),
-    # A very large matrix
-    ([[3]*5000 for _ in range(5000)], 1),
+    # A very large matrix - as a read-only broadcast view of a single value,
+    # which needs no memory for its entries
+    (np.broadcast_to(np.int8(3), (5000, 5000)), 1),
     # Matrix with only high values (no domains expected)
     ([[30]*10 for _ in range(10)], 0),
     # 4x4 matrix with low values, but within ignored distance so no domains expected
@@ -156,7 +188,7 @@ def test_edge_cases_input_structure(pae, expected_length):
     domains = find_domains_from_pae(pae)
     # simplify pae if large so failure print statemtents not overwhelming
     if len(pae) > 5:
-        pae = f"length {len(pae)}, starting {pae[0][:10]}..."
+        pae = f"length {len(pae)}, starting {list(pae[0][:10])}..."
     assert len(domains) == expected_length, f"Expected {expected_length} domains, got {len(domains)} domains, {domains} for pae {pae}"
 
 @pytest.mark.parametrize("pae, expected_domain_length", [
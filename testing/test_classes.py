@@ -1,6 +1,9 @@
 """
 Test file for classes in the AlphaFragment package.
 """
+import copy
+import pickle
+import numpy as np
 import pytest
 from alphafragment.classes import Domain, Protein, ProteinSubsection
 
@@ -118,6 +121,134 @@ def test_add_fragment(fragment, expected_exception, message):
         # Verify by checking the last added fragment
         assert protein.fragment_list[-1] == fragment, "Fragment was not added correctly."
 
+@pytest.mark.parametrize("fragments, message", [
+    # Valid fragments, as a list of tuples
+    ([(30, 40), (35, 60)], ""),
+    # Valid fragments, as an array
+    (np.array([[10, 50], [45, 100]]), ""),
+    # No fragments
+    ([], ""),
+    # Fragment start is greater than end
+    ([(30, 40), (50, 45)], "Start and end must be positive integers, and start must be less than end."),
+    # Not integers
+    ([(30.5, 40)], "Start and end must be positive integers, and start must be less than end."),
+    # Not (start, end) pairs
+    ([30, 40], "Invalid fragments."),
+    # Non-sequential fragments
+    ([(30, 40), (20, 50)], "Start of the new fragment must be greater than the start of the previous fragment."),
+    # Not sequential with the fragment already added
+    ([(5, 40)], "Start of the new fragment must be greater than the start of the previous fragment."),
+    # Fragment outside of protein bounds - after end
+    ([(50, 110)], "End of the new fragment must be within the protein sequence bounds."),
+])
+def test_add_fragments_bulk(fragments, message):
+    """
+    Test the add_fragments_bulk method of the Protein class with different fragment inputs.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*100)
+    #Add initial (valid) fragment
+    protein.add_fragment(10, 20)
+    if message:
+        with pytest.raises(ValueError) as exc_info:
+            protein.add_fragments_bulk(fragments)
+        assert message in str(exc_info.value), f"Unexpected error message: {exc_info.value}. Expected: {message}"
+        assert protein.fragment_list == [(10, 20)], "Fragments should not be added if any are invalid."
+    else:
+        protein.add_fragments_bulk(fragments)
+        expected = [(10, 20)] + [tuple(fragment) for fragment in np.asarray(fragments).tolist()]
+        assert protein.fragment_list == expected, f"Fragments were not added correctly, expected {expected}, got {protein.fragment_list}"
+
+def test_fragment_arrays():
+    """
+    Test that fragments are stored as parallel start/end arrays, and that
+    fragment_list is built from these arrays.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*100, fragment_list=[(0, 20)])
+    protein.add_fragment(15, 40)
+    protein.add_fragment((35, 60))
+    assert protein.fragment_starts.tolist() == [0, 15, 35], f"Unexpected fragment starts: {protein.fragment_starts}"
+    assert protein.fragment_ends.tolist() == [20, 40, 60], f"Unexpected fragment ends: {protein.fragment_ends}"
+    assert protein.fragment_list == [(0, 20), (15, 40), (35, 60)], f"Unexpected fragment list: {protein.fragment_list}"
+    assert all(isinstance(value, int) for fragment in protein.fragment_list for value in fragment), "fragment_list should contain python integers"
+
+    # Assigning a new fragment list replaces the stored fragments
+    protein.fragment_list = [(0, 50), (45, 100)]
+    assert protein.fragment_list == [(0, 50), (45, 100)], f"Fragment list was not replaced, got {protein.fragment_list}"
+
+    # Fragments must be given in order of start position
+    with pytest.raises(ValueError):
+        protein.fragment_list = [(50, 60), (0, 10)]
+    assert protein.fragment_list == [(0, 50), (45, 100)], f"Fragment list should be unchanged after invalid assignment, got {protein.fragment_list}"
+    with pytest.raises(ValueError):
+        Protein("TestProtein", "fake_id", "A"*100, fragment_list=[(50, 60), (0, 10)])
+
+def test_add_fragment_many():
+    """
+    Test that many fragments added one at a time, mixed with bulk additions and
+    reads of the fragments, are all stored in order.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*3000)
+    expected = []
+    for start in range(0, 1000, 2):
+        protein.add_fragment(start, start + 10)
+        expected.append((start, start + 10))
+        if start == 500:
+            assert protein.fragment_list == expected, "Fragments added so far were not stored correctly"
+            protein.add_fragments_bulk([(501, 520), (501, 530)])
+            expected.extend([(501, 520), (501, 530)])
+    assert protein.fragment_list == expected, "Fragments added one at a time were not stored correctly"
+    assert protein.fragment_starts.dtype == np.int32, f"Expected int32 fragment starts, got {protein.fragment_starts.dtype}"
+
+@pytest.mark.parametrize("change", [
+    lambda fragments: fragments.append((60, 80)),
+    lambda fragments: fragments.extend([(60, 80)]),
+    lambda fragments: fragments.insert(0, (60, 80)),
+    lambda fragments: fragments.pop(),
+    lambda fragments: fragments.clear(),
+    lambda fragments: fragments.__setitem__(0, (60, 80)),
+    lambda fragments: fragments.__delitem__(0),
+])
+def test_fragment_list_read_only(change):
+    """
+    Test that changing fragment_list in place raises an error rather than being
+    silently lost, and leaves the fragments unchanged.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*100, fragment_list=[(0, 20), (15, 40)])
+    fragments = protein.fragment_list
+    with pytest.raises(TypeError):
+        change(fragments)
+    assert protein.fragment_list == [(0, 20), (15, 40)], f"Fragments should be unchanged, got {protein.fragment_list}"
+
+def test_fragment_list_copy():
+    """
+    Test that copies of fragment_list can be made, and that a copy made with
+    list() can be changed.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*100, fragment_list=[(0, 20), (15, 40)])
+    assert copy.deepcopy(protein.fragment_list) == [(0, 20), (15, 40)], "fragment_list could not be copied"
+    assert pickle.loads(pickle.dumps(protein.fragment_list)) == [(0, 20), (15, 40)], "fragment_list could not be pickled"
+    fragments = list(protein.fragment_list)
+    fragments.append((35, 60))
+    assert fragments == [(0, 20), (15, 40), (35, 60)], f"Copy of fragment_list could not be changed, got {fragments}"
+
+@pytest.mark.parametrize("region, expected", [
+    # Region inside a single fragment
+    ((2, 5), [(0, 20)]),
+    # Region covering an overlap between fragments
+    ((16, 18), [(0, 20), (15, 40)]),
+    # Region ending where a fragment starts (end is exclusive)
+    ((20, 35), [(15, 40)]),
+    # Region after all fragments
+    ((60, 70), []),
+])
+def test_overlapping_fragments(region, expected):
+    """
+    Test the overlapping_fragments method of the Protein class.
+    """
+    protein = Protein("TestProtein", "fake_id", "A"*100, fragment_list=[(0, 20), (15, 40), (35, 60)])
+    result = protein.overlapping_fragments(*region)
+    assert result == expected, f"Expected fragments {expected} to overlap region {region}, got {result}"
+
 def test_protein_equality():
     """
     Test that the __eq__ method of the Protein class works as expected
@@ -140,6 +271,14 @@ def test_protein_equality():
     assert protein1 != protein5, "Proteins with different names should not be equal"
     assert protein1 != protein6, "Protein and non-Protein object should not be equal"
 
+    # Proteins differing only in domains or fragments
+    protein7 = Protein("ProteinA", "P12345", "MKQLEDKVEE", 0, 9, [Domain("D1", 1, 5, "TYPE")])
+    protein8 = Protein("ProteinA", "P12345", "MKQLEDKVEE", 0, 9, [Domain("D1", 1, 6, "TYPE")])
+    protein9 = Protein("ProteinA", "P12345", "MKQLEDKVEE", 0, 9, fragment_list=[(0, 10)])
+    assert protein1 != protein7, "Proteins with different numbers of domains should not be equal"
+    assert protein7 != protein8, "Proteins with different domains should not be equal"
+    assert protein1 != protein9, "Proteins with different fragments should not be equal"
+
 def test_protein_str():
     """
     Test that the __str__ method of the Protein class works as expected
@@ -161,6 +300,20 @@ def test_protein_repr():
     actual_repr = repr(protein).replace("Domain(...)", "repr(domain)")
     assert actual_repr == expected_repr, "The repr representation of the protein is incorrect"
 
+def test_protein_repr_truncates_long_lists():
+    """
+    Test that the __repr__ method of the Protein class only includes the first
+    few domains and fragments.
+    """
+    domains = [Domain(f"D{i}", i*10, i*10+5, "A") for i in range(7)]
+    fragments = [(i*10, i*10+15) for i in range(6)]
+    protein = Protein("ProteinA", "P12345", "A"*100, domain_list=domains, fragment_list=fragments)
+    protein_repr = repr(protein)
+    assert "D4" in protein_repr and "D5" not in protein_repr, "Only the first 5 domains should be included in the repr"
+    assert "... (+2 more)" in protein_repr, "Number of domains left out of the repr was not given"
+    assert "(40, 55)" in protein_repr and "(50, 65)" not in protein_repr, "Only the first 5 fragments should be included in the repr"
+    assert "... (+1 more)" in protein_repr, "Number of fragments left out of the repr was not given"
+
 # Tests for ProteinSubsection
 def test_protein_subsection_initialization():
     """
@@ -170,6 +323,8 @@ def test_protein_subsection_initialization():
     subsection = ProteinSubsection(parent_protein, 0, 3)
     assert subsection.name == parent_protein.name, f"ProteinSubsection name did not initialize correctly, expected 'Protein1', got {subsection.name}"
     assert subsection.sequence == "MKKL", f"ProteinSubsection sequence did not initialize correctly, expected 'MKK', got {subsection.sequence}"
+    assert subsection.sequence_bytes.obj is parent_protein.sequence_bytes, "ProteinSubsection sequence should be a view of the parent sequence, not a copy"
+    assert subsection.sequence_length == 4, f"ProteinSubsection sequence_length incorrect, expected 4, got {subsection.sequence_length}"
 
     # Test that using the ProteinSubsection class with start > end raises a ValueError
     with pytest.raises(ValueError):
@@ -187,3 +342,34 @@ def test_protein_subsection_initialization():
         assert subsection.sequence == parent_protein.sequence, f"ProteinSubsection sequence did not initialize correctly at the bounds of the parent sequence, expected {parent_protein.sequence}, got {subsection.sequence}"
     except ValueError:
         pytest.fail("Unexpected ValueError for a valid end boundary")
+
+def test_protein_subsection_shares_fragments():
+    """
+    Test that a ProteinSubsection shares the fragments of its parent protein, so
+    fragments added to either are seen by both, until a new fragment_list is
+    assigned to the subsection.
+    """
+    parent_protein = Protein("Protein1", "P12345", "A"*100, fragment_list=[(0, 20)])
+    subsection = ProteinSubsection(parent_protein, 10, 60)
+    assert subsection.fragment_list == [(0, 20)], f"Subsection should have the parent's fragments, got {subsection.fragment_list}"
+
+    parent_protein.add_fragment(15, 40)
+    subsection.add_fragments_bulk([(35, 50)])
+    expected = [(0, 20), (15, 40), (35, 50)]
+    assert parent_protein.fragment_list == expected, f"Expected parent fragments {expected}, got {parent_protein.fragment_list}"
+    assert subsection.fragment_list == expected, f"Expected subsection fragments {expected}, got {subsection.fragment_list}"
+
+    subsection.fragment_list = [(10, 30)]
+    assert parent_protein.fragment_list == expected, "Assigning subsection fragments should not change the parent's fragments"
+
+def test_classes_use_slots():
+    """
+    Test that Domain, Protein and ProteinSubsection instances don't carry an
+    instance __dict__, and so can't be given attributes outside their slots.
+    """
+    parent_protein = Protein("Protein1", "P12345", "MKKLLPT")
+    instances = [Domain("D1", 1, 2, "TYPE"), parent_protein, ProteinSubsection(parent_protein, 0, 3)]
+    for instance in instances:
+        assert not hasattr(instance, '__dict__'), f"{type(instance).__name__} instance should not have a __dict__"
+        with pytest.raises(AttributeError):
+            instance.unexpected_attribute = None
@@ -51,10 +51,13 @@ def test_initialize_proteins_from_csv(csv_data, expected_success, expected_error
     """
     Test the initialization of Protein objects from CSV data and capture print output.
     """
-    with patch('pandas.read_csv', return_value=pd.read_csv(StringIO(csv_data))):
+    with patch('pandas.read_csv', return_value=pd.read_csv(StringIO(csv_data))), \
+         patch('alphafragment.process_proteins_csv.fetch_uniprot_info_batch') as mock_batch_fetch:
+        # Setup mock to simulate batch fetching results
+        mock_batch_fetch.side_effect = lambda ids, **kwargs: {x: {'sequence': 'AAA'} for x in ids if x == 'P12345'}
         with patch('alphafragment.process_proteins_csv.fetch_uniprot_info') as mock_fetch:
             # Setup mock to simulate fetching results
-            mock_fetch.side_effect = lambda x: {'sequence': 'AAA'} if x == 'P12345' else None
+            mock_fetch.side_effect = lambda x, **kwargs: {'sequence': 'AAA'} if x == 'P12345' else None
             proteins, df = initialize_proteins_from_csv("fake_path")
 
             # Use capfd to capture print statements
@@ -67,6 +70,67 @@ def test_initialize_proteins_from_csv(csv_data, expected_success, expected_error
             if expected_errors:
                 assert f"Proteins with errors or no data available: {expected_errors}" in out
 
+def test_initialize_proteins_from_csv_fetches_each_accession_once():
+    """
+    Test that fetching requests each distinct accession ID once - in a batch, or
+    individually if not found in the batch - and returns proteins in CSV order,
+    with sequences matched to the right proteins
+    """
+    csv_data = ('name,accession_id\nProteinA,P1\nProteinB,P2\nProteinC,P1\n'
+                'ProteinD,P3\nProteinE,P2')
+    sequences = {'P1': 'AAA', 'P2': 'CCC', 'P3': 'DDD'}
+    with patch('pandas.read_csv', return_value=pd.read_csv(StringIO(csv_data))), \
+         patch('alphafragment.process_proteins_csv.fetch_uniprot_info_batch') as mock_batch_fetch:
+        # P3 is not found in the batch, so should be fetched individually
+        mock_batch_fetch.side_effect = lambda ids, **kwargs: {x: {'sequence': sequences[x]} for x in ids if x != 'P3'}
+        with patch('alphafragment.process_proteins_csv.fetch_uniprot_info') as mock_fetch:
+            mock_fetch.side_effect = lambda x, **kwargs: {'sequence': sequences[x]}
+            proteins, _ = initialize_proteins_from_csv("fake_path", max_workers=3)
+
+    batch_fetched = mock_batch_fetch.call_args.args[0]
+    assert batch_fetched == ['P1', 'P2', 'P3'], f"Expected each accession to be batch fetched once, got {batch_fetched}"
+    fetched = [call.args[0] for call in mock_fetch.call_args_list]
+    assert fetched == ['P3'], f"Expected only the accession missing from the batch to be fetched individually, got {fetched}"
+    result = [(protein.name, protein.sequence) for protein in proteins]
+    expected = [('ProteinA', 'AAA'), ('ProteinB', 'CCC'), ('ProteinC', 'AAA'),
+                ('ProteinD', 'DDD'), ('ProteinE', 'CCC')]
+    assert result == expected, f"Expected proteins {expected}, got {result}"
+
+def test_initialize_proteins_from_csv_cleans_entries(capfd):
+    """
+    Test that entries without a name are skipped, and that whitespace is stripped
+    from names, accession IDs and manual sequences
+    """
+    csv_data = 'name,accession_id,sequence\n ProteinA , P12345 ,\n,P12345,\nProteinB,, CCC '
+    with patch('pandas.read_csv', return_value=pd.read_csv(StringIO(csv_data))), \
+         patch('alphafragment.process_proteins_csv.fetch_uniprot_info_batch') as mock_batch_fetch, \
+         patch('alphafragment.process_proteins_csv.fetch_uniprot_info', return_value=None):
+        mock_batch_fetch.side_effect = lambda ids, **kwargs: {x: {'sequence': 'AAA'} for x in ids if x == 'P12345'}
+        proteins, _ = initialize_proteins_from_csv("fake_path")
+        out, _ = capfd.readouterr()
+
+    result = [(protein.name, protein.accession_id, protein.sequence) for protein in proteins]
+    expected = [('ProteinA', 'P12345', 'AAA'), ('ProteinB', '', 'CCC')]
+    assert result == expected, f"Expected proteins {expected}, got {result}"
+    assert "Missing protein name; skipping entry." in out, "Expected entry without a name to be reported as skipped"
+
+def test_initialize_proteins_from_csv_reads_text(tmp_path):
+    """
+    Test that all columns are read as text, so other columns are kept exactly as
+    written and numeric columns are returned as strings
+    """
+    csv_path = tmp_path / "proteins.csv"
+    csv_path.write_text('name,accession_id,sequence,plate,score\nProtein1,,CCC,007,1.5\nProtein2,,DDD,8,\n')
+    with patch('alphafragment.process_proteins_csv.fetch_uniprot_info_batch', return_value={}), \
+         patch('alphafragment.process_proteins_csv.fetch_uniprot_info', return_value=None):
+        proteins, df = initialize_proteins_from_csv(str(csv_path))
+
+    assert [protein.sequence for protein in proteins] == ['CCC', 'DDD'], "Expected proteins to be initialized from manual sequences"
+    assert df['plate'].tolist() == ['007', '8'], f"Expected other columns to be read as text, got {df['plate'].tolist()}"
+    # Numeric columns are returned as strings, with empty cells as NaN
+    assert df['score'].iloc[0] == '1.5', f"Expected numeric columns to be returned as strings, got {df['score'].iloc[0]!r}"
+    assert pd.isna(df['score'].iloc[1]), f"Expected empty cells to be NaN, got {df['score'].iloc[1]!r}"
+
 @pytest.mark.parametrize("csv_data, expected_columns, raises_error, error_message", [
     # No column headings
     ('Protein11,P12345\nProtein12,P12345', None, True, "Missing required columns: name, accession_id"),
@@ -147,7 +211,11 @@ def test_column_presence(columns, expected_error):
     # Valid input with domains in tuple format (unnamed)
     ('Protein1', '[(1, 10), (20, 30)]', [Domain('manual_D1', 0, 9, 'manually_defined'), Domain('manual_D2', 19, 29, 'manually_defined')]),
     # Valid input with domains in dictionary format (named)
-    ('Protein1', "{'name1':(1,10), 'name2':(20,30)}", [Domain('name1', 0, 9, 'manually_defined'), Domain('name2', 19, 29, 'manually_defined')])
+    ('Protein1', "{'name1':(1,10), 'name2':(20,30)}", [Domain('name1', 0, 9, 'manually_defined'), Domain('name2', 19, 29, 'manually_defined')]),
+    # Valid input with domains in JSON list format (unnamed)
+    ('Protein1', '[[1, 10], [20, 30]]', [Domain('manual_D1', 0, 9, 'manually_defined'), Domain('manual_D2', 19, 29, 'manually_defined')]),
+    # Valid input with domains in JSON object format (named)
+    ('Protein1', '{"name1": [1, 10], "name2": [20, 30]}', [Domain('name1', 0, 9, 'manually_defined'), Domain('name2', 19, 29, 'manually_defined')])
 ])
 def test_various_inputs(protein_name, domain_data, expected_result):
     """
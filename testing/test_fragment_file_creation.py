@@ -53,6 +53,17 @@ def test_get_protein_combinations(proteins, method, one_protein, combinations_cs
             assert len(combinations) == len(expected_output)
             assert combinations == expected_output, f"Expected: {expected_output}, got: {combinations}"
 
+def test_get_protein_combinations_missing_proteins(proteins, tmp_path, capsys):
+    """
+    Test that the specific method skips blank rows and combinations with missing
+    proteins, reporting the missing proteins.
+    """
+    combinations_csv = tmp_path / "combinations.csv"
+    combinations_csv.write_text("ProteinA,ProteinB\n\nProteinA,ProteinC\n", encoding='utf-8')
+    combinations = get_protein_combinations(proteins, "specific", combinations_csv=str(combinations_csv), one_protein=None)
+    assert combinations == [(protein1, protein2)], f"Expected only the ProteinA-ProteinB combination, got: {combinations}"
+    assert "Missing proteins: ProteinC." in capsys.readouterr().out, "Missing protein was not reported"
+
 @pytest.mark.parametrize("method, combinations_csv, one_protein, expected_calls", [
     # All v all method - expecting 10 files (3 self pairs for each, 4 ProteinA-ProteinB pairs)
     ("all", None, None, 10),
@@ -83,7 +94,7 @@ def test_output_pulldown_creates_correct_file(proteins):
         handle.write.assert_called()
         calls = handle.write.call_args_list
         assert len(calls) > 0, "Expected write calls, but none were made"
-        lines = calls[0][0][0].split('\n') # Split output into lines
+        lines = calls[0][0][0].decode('utf-8').split('\n') # Decode written bytes and split output into lines
         print(lines)
         first_line = lines[0]
         assert first_line == "O123,1-7;O123,1-7", f"Incorrect first line of output, got: {first_line}"
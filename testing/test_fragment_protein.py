@@ -86,3 +86,43 @@ def test_invalid_protein_input():
     """
     with pytest.raises(TypeError):
         fragment_protein("not a protein"), "Expected TypeError for invalid protein input"
+
+def test_max_len_increase():
+    """
+    Test that the maximum length is increased when no fragmentation is possible
+    within it, and that a ValueError is raised if len_increase doesn't allow this
+    """
+    def make_protein():
+        return Protein(name="Protein1", accession_id="example_acc_id", sequence='A'*90,
+                       domain_list=[Domain(1, 18, 45, 'TYPE'), Domain(2, 48, 69, 'TYPE')])
+    overlap = {'min': 0, 'ideal': 5, 'max': 10}
+    fragments = fragment_protein(make_protein(), 20, 30, overlap, len_increase=5)
+    assert fragments == [(0, 48), (46, 75), (70, 90)], f"Expected fragments [(0, 48), (46, 75), (70, 90)], got {fragments}"
+    with pytest.raises(ValueError):
+        fragment_protein(make_protein(), 20, 30, overlap, len_increase=0), "Expected ValueError for len_increase of 0 when max length needs to be increased"
+
+def test_max_len_increase_carries_over():
+    """
+    Test that when sections are fragmented one at a time, an increase in maximum
+    length needed by one section is kept for the sections that follow it
+    """
+    protein = Protein(name="Protein1", accession_id="example_acc_id", sequence='A'*115,
+                      domain_list=[Domain(1, 62, 66, 'TYPE'), Domain(2, 27, 70, 'TYPE')])
+    overlap = {'min': 1, 'ideal': 1, 'max': 1}
+    fragments = fragment_protein(protein, 14, 16, overlap, len_increase=3)
+    expected = [(1, 27), (26, 72), (71, 85), (84, 98), (97, 115)]
+    assert fragments == expected, f"Expected fragments {expected}, got {fragments}"
+
+def test_parallel_fragmentation():
+    """
+    Test that fragmenting the sections between long domains in worker processes
+    gives the same fragments as fragmenting them in turn
+    """
+    def make_protein():
+        return Protein(name="Protein1", accession_id="example_acc_id", sequence='A'*1000,
+                       domain_list=[Domain(i, i*200 + 100, i*200 + 160, 'TYPE') for i in range(4)] +
+                                   [Domain(i + 4, i*200 + 20, i*200 + 35, 'TYPE') for i in range(5)])
+    overlap = {'min': 5, 'ideal': 10, 'max': 15}
+    fragments = fragment_protein(make_protein(), 20, 50, overlap)
+    parallel_fragments = fragment_protein(make_protein(), 20, 50, overlap, max_workers=2)
+    assert parallel_fragments == fragments, f"Expected parallel fragments {fragments}, got {parallel_fragments}"
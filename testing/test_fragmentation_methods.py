@@ -107,6 +107,82 @@ def test_recursive_fragmentation_lengths_and_overlaps(domains, min_len, max_len,
             actual_overlap = start + fragment_length - next_start
             assert overlap['min'] <= actual_overlap <= overlap['max'], f"Overlap {actual_overlap} out of bounds ({min_overlap}, {max_overlap}) between fragments {i} and {i+1}"
 
+def test_recursive_fragmentation_overlapping_domains():
+    """
+    Tests that recursive_fragmentation doesn't cut through any domain when given
+    overlapping, unsorted domains that have not been merged beforehand.
+    """
+    domains = [Domain(1, 9, 14, 'TYPE'), Domain(2, 3, 7, 'TYPE'), Domain(3, 6, 10, 'TYPE')]
+    overlap = {'min': 0, 'ideal': 1, 'max': 2}
+    result = recursive_fragmentation(Protein("Protein1", "example_acc_id", 'A'*20),
+                                     domains, 0, 3, 15, overlap)
+
+    assert result is not None, "No fragmentation found for overlapping domains"
+    for start, end in result:
+        for domain in domains:
+            assert not domain.start < end <= domain.end, f"Fragment {(start, end)} cuts through domain {domain}"
+            assert not domain.start < start <= domain.end, f"Fragment {(start, end)} cuts through domain {domain}"
+
+def test_recursive_fragmentation_adjusts_overlap_with_zero_min_overlap():
+    """
+    Tests that recursive_fragmentation adjusts the overlap between fragments
+    when the ideal overlap would cut through a domain and the minimum overlap
+    is 0.
+    """
+    domains = [Domain(1, 3, 6, 'TYPE'), Domain(2, 7, 10, 'TYPE')]
+    overlap = {'min': 0, 'ideal': 1, 'max': 3}
+    result = recursive_fragmentation(Protein("Protein1", "example_acc_id", 'A'*15),
+                                     domains, 0, 6, 8, overlap)
+
+    assert result == [(0, 7), (7, 15)], f"Expected [(0, 7), (7, 15)], got {result}"
+
+@pytest.mark.parametrize(
+    "sequence_length, min_len, max_len, expected",
+    [
+        # Fits in one fragment
+        (15, 10, 15, [(0, 15)]),
+        # Shortest possible fragments first, with the rest in the last fragment
+        (20, 10, 15, [(0, 10), (8, 20)]),
+        (40, 10, 15, [(0, 10), (8, 18), (16, 27), (25, 40)]),
+        # No fragmentation is possible within the length bounds
+        (20, 15, 15, None),
+    ]
+)
+def test_recursive_fragmentation_without_domains(sequence_length, min_len, max_len, expected):
+    """
+    Tests that recursive_fragmentation splits a sequence without domains in the
+    same order as a sequence with domains - trying the shortest fragments first,
+    with the ideal overlap.
+    """
+    overlap = {'min': 1, 'ideal': 2, 'max': 3}
+    result = recursive_fragmentation(Protein("Protein1", "example_acc_id", 'A'*sequence_length),
+                                     [], 0, min_len, max_len, overlap)
+    assert result == expected, f"Expected {expected}, got {result}"
+
+@pytest.mark.parametrize(
+    "sequence_length, min_len, max_len, overlap", [
+        (20, 10, 15, {'min': 1, 'ideal': 2, 'max': 3}),
+        (137, 10, 15, {'min': 1, 'ideal': 2, 'max': 3}),
+        (500, 20, 23, {'min': 0, 'ideal': 5, 'max': 10}),
+        (1000, 30, 60, {'min': 5, 'ideal': 10, 'max': 15}),
+        (61, 30, 30, {'min': 0, 'ideal': 0, 'max': 0}),
+        (64, 30, 30, {'min': 0, 'ideal': 0, 'max': 0}),
+    ]
+)
+def test_recursive_fragmentation_without_domains_matches_search(sequence_length, min_len,
+                                                                max_len, overlap):
+    """
+    Tests that a sequence without domains, which is fragmented without searching,
+    is split the same way as by the search used for sequences with domains. A
+    domain over the first two residues only rules out a cutpoint shorter than
+    min_len, so doesn't change the fragments, but means the search is used.
+    """
+    protein = Protein("Protein1", "example_acc_id", 'A'*sequence_length)
+    result = recursive_fragmentation(protein, [], 0, min_len, max_len, overlap)
+    searched = recursive_fragmentation(protein, [Domain(1, 0, 1, 'TYPE')], 0,
+                                       min_len, max_len, overlap)
+    assert result == searched, f"Expected {searched}, got {result}"
+
 @pytest.mark.parametrize("overlap, expected_error",
     [
         # max overlap < min_overlap
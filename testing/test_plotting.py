@@ -6,6 +6,7 @@ import itertools
 import pytest
 from matplotlib import pyplot as plt
 from matplotlib import colors
+from matplotlib.collections import LineCollection
 from alphafragment.classes import Protein, Domain
 from alphafragment.plot_fragments import plot_domain, plot_fragment, draw_label, calculate_tick_freq, plot_fragmentation_output
 
@@ -165,10 +166,9 @@ def test_tick_frequency_invalid_input(num):
     with pytest.raises(ValueError):
         calculate_tick_freq(num), "Invalid input should raise ValueError"
 
-@patch("os.path.exists", return_value=False)
 @patch("os.makedirs")
 @patch("matplotlib.figure.Figure.savefig")
-def test_plot_fragmentation_output_saving(mock_savefig, mock_makedirs, mock_exists):
+def test_plot_fragmentation_output_saving(mock_savefig, mock_makedirs):
     """
     Test that the function creates the save location directory and saves the figure when a save location is provided
     """
@@ -179,8 +179,26 @@ def test_plot_fragmentation_output_saving(mock_savefig, mock_makedirs, mock_exis
     domain2 = Domain("2", 120, 200, 'UniProt')
     protein = Protein("TestProtein", "accession", "sequence", first_res=1, last_res=300, domain_list=[domain1, domain2], fragment_list=fragments)
     plot_fragmentation_output(protein, protein.fragment_list, save_location=save_location)
-    mock_makedirs.assert_called_once_with(save_location), "Directory was not created when save location was provided"
+    mock_makedirs.assert_called_once_with(save_location, exist_ok=True), "Directory was not created when save location was provided"
     mock_savefig.assert_called_once(), "Figure was not saved when save location was provided"
+    assert mock_savefig.call_args[0][0] == "/fake/path/TestProteinfragments.png", f"Figure saved to unexpected path {mock_savefig.call_args[0][0]}"
+
+@patch("matplotlib.figure.Figure.savefig")
+def test_plot_fragmentation_output_saved_figure_not_kept_open(mock_savefig, tmp_path):
+    """
+    Test that saved figures are not kept open in pyplot so they don't accumulate,
+    while unsaved figures are left open for display
+    """
+    protein = Protein("TestProtein", "accession", "sequence", first_res=1, last_res=300, domain_list=[Domain("1", 1, 100, 'AF')])
+    plt.close('all')
+
+    saved_fig = plot_fragmentation_output(protein, [(50, 150)], save_location=str(tmp_path))
+    assert not plt.get_fignums(), "Saved figure should not be kept open in pyplot"
+    assert len(saved_fig.axes[0].collections) == 2, "Saved figure should still contain the plot"
+
+    unsaved_fig = plot_fragmentation_output(protein, [(50, 150)])
+    assert plt.fignum_exists(unsaved_fig.number), "Unsaved figure should be left open"
+    plt.close('all')
 
 def test_plot_fragmentation_output_no_save():
     """
@@ -195,6 +213,35 @@ def test_plot_fragmentation_output_no_save():
         plot_fragmentation_output(protein, protein.fragment_list)
         mock_savefig.assert_not_called(), "Figure was saved when no save location was provided"
 
+def count_patches(ax):
+    """
+    Counts the rectangles plotted on an axis, whether added individually or as
+    part of a collection
+    """
+    return len(ax.patches) + sum(len(collection.get_paths()) for collection in ax.collections)
+
+@patch("matplotlib.figure.Figure.savefig")
+def test_plot_fragmentation_output_existing_axis(mock_savefig, tmp_path):
+    """
+    Test that a provided axis is plotted on and reused, and that its figure is
+    left open after saving
+    """
+    protein = Protein("TestProtein", "accession", "sequence", first_res=1, last_res=300, domain_list=[Domain("1", 1, 100, 'AF')])
+    plt.close('all')
+    fig, ax = plt.subplots()
+
+    returned_fig = plot_fragmentation_output(protein, [(50, 150)], save_location=str(tmp_path), ax=ax)
+    assert returned_fig is fig, "Figure of the provided axis should be returned"
+    assert len(plt.get_fignums()) == 1, "No new figure should be created when an axis is provided"
+    assert plt.fignum_exists(fig.number), "Figure of a provided axis should not be closed after saving"
+    assert count_patches(ax) == 2, f"Expected 2 patches on the provided axis (1 domain + 1 fragment), but got {count_patches(ax)}"
+
+    # Reusing the axis for another protein after clearing it
+    ax.clear()
+    plot_fragmentation_output(protein, [(0, 150), (140, 301)], ax=ax)
+    assert count_patches(ax) == 3, f"Expected 3 patches on the reused axis (1 domain + 2 fragments), but got {count_patches(ax)}"
+    plt.close('all')
+
 def test_plot_fragmentation_output_integration():
     """
     Test that the function plots correct number of domains and fragments on the figure
@@ -207,7 +254,18 @@ def test_plot_fragmentation_output_integration():
     fig = plot_fragmentation_output(protein, protein.fragment_list)
     ax = fig.axes[0]
 
-    assert len(ax.patches) == 5, f"Should have 5 elements (3 fragments and 2 domains) plotted, but got {len(ax.patches)} elements"
+    assert len(ax.collections) == 2, f"Domains and fragments should be plotted as 2 collections, but got {len(ax.collections)}"
+    plotted = count_patches(ax)
+    assert plotted == 5, f"Should have 5 elements (3 fragments and 2 domains) plotted, but got {plotted} elements"
+
+    # Domain colors and alpha are kept within the collection
+    domain_colors = [tuple(color) for color in ax.collections[0].get_facecolor()]
+    expected_colors = [colors.to_rgba('orange', 0.5), colors.to_rgba('green', 0.5)]
+    assert domain_colors == expected_colors, f"Domain colors do not match expected, expected {expected_colors} but got {domain_colors}"
+
+    # Fragments alternate between positive and negative vertical offsets
+    fragment_bottoms = [path.vertices[:, 1].min() for path in ax.collections[1].get_paths()]
+    assert fragment_bottoms[0] > fragment_bottoms[1] < fragment_bottoms[2], f"Fragment offsets should alternate, but got bottoms {fragment_bottoms}"
 
 def test_large_protein_many_domains():
     """
@@ -218,7 +276,109 @@ def test_large_protein_many_domains():
     fragments = [(i * 100 + 25, i * 100 + 75) for i in range(100)]
     protein = Protein("VeryLargeProtein", "accession", "sequence", first_res=1, last_res=10000, domain_list=domain_list, fragment_list=fragments)
     fig = plot_fragmentation_output(protein, protein.fragment_list)
-    assert len(fig.axes[0].patches) == 200, f"Expected 200 patches on the plot (100 domains + 100 fragments), but got {len(fig.axes[0].patches)} patches"
+    plotted = count_patches(fig.axes[0])
+    assert plotted == 200, f"Expected 200 patches on the plot (100 domains + 100 fragments), but got {plotted} patches"
+
+@pytest.mark.parametrize("last_res, expected_ticks", [
+    # Last multiple of tick frequency dropped as it is next to the final tick
+    (300, [1, 50, 100, 150, 200, 250, 301]),
+    # Last multiple of tick frequency kept when far enough from the final tick
+    (340, [1, 50, 100, 150, 200, 250, 300, 341]),
+    # Tick frequency of 1 doesn't repeat the first tick
+    (5, [1, 2, 3, 4, 5, 6])
+])
+def test_plot_fragmentation_output_ticks(last_res, expected_ticks):
+    """
+    Test that x axis ticks are placed at multiples of the tick frequency, between
+    ticks at the first and last positions
+    """
+    protein = Protein("TestProtein", "accession", "sequence", first_res=0, last_res=last_res)
+    fig = plot_fragmentation_output(protein, [])
+    ticks = list(fig.axes[0].get_xticks())
+    labels = [tick_label.get_text() for tick_label in fig.axes[0].get_xticklabels()]
+    assert ticks == expected_ticks, f"Expected ticks {expected_ticks}, but got {ticks}"
+    assert labels == [str(tick) for tick in expected_ticks], f"Tick labels {labels} do not match ticks {expected_ticks}"
+    plt.close(fig)
+
+@pytest.mark.parametrize("label, expected_labels", [
+    # No labels by default
+    (None, []),
+    (['AF', 'UniProt'], ['1', '2']),
+    # Single type given as a string
+    ('UniProt', ['2'])
+])
+def test_plot_fragmentation_output_labels(label, expected_labels):
+    """
+    Test that only domains of the requested types are labelled
+    """
+    domains = [Domain("1", 1, 100, 'AF'), Domain("2", 120, 200, 'UniProt'), Domain("3", 220, 250, 'manually_defined')]
+    protein = Protein("TestProtein", "accession", "sequence", first_res=1, last_res=300, domain_list=domains)
+    fig = plot_fragmentation_output(protein, [], label=label)
+    labels = [text.get_text() for text in fig.axes[0].texts]
+    assert labels == expected_labels, f"Expected labels {expected_labels}, but got {labels}"
+    # Bracket lines for all labels are drawn as one collection, with 2 lines per label
+    brackets = [segment for collection in fig.axes[0].collections if isinstance(collection, LineCollection)
+                for segment in collection.get_segments()]
+    assert len(brackets) == 2 * len(expected_labels), f"Expected {2 * len(expected_labels)} bracket lines, but got {len(brackets)}"
+    plt.close(fig)
+
+def test_plot_fragmentation_output_color_modes():
+    """
+    Test that domain colors are assigned by type, or cycled through in order,
+    and that an invalid color mode raises a ValueError
+    """
+    domains = [Domain(str(i), i * 20, i * 20 + 10, 'AF' if i % 2 == 0 else 'UniProt') for i in range(9)]
+    protein = Protein("TestProtein", "accession", "sequence", first_res=0, last_res=200, domain_list=domains)
+
+    fig = plot_fragmentation_output(protein, [], color_mode='type')
+    plotted = [tuple(color) for color in fig.axes[0].collections[0].get_facecolor()]
+    expected = [colors.to_rgba('orange' if i % 2 == 0 else 'green', 0.5) for i in range(9)]
+    assert plotted == expected, f"Expected colors by type {expected}, but got {plotted}"
+
+    fig = plot_fragmentation_output(protein, [], color_mode='cycle')
+    plotted = [tuple(color) for color in fig.axes[0].collections[0].get_facecolor()]
+    cycle = ['skyblue', 'pink', 'cyan', 'gold', 'purple', 'silver', 'tan']
+    expected = [colors.to_rgba(cycle[i % len(cycle)], 0.5) for i in range(9)]
+    assert plotted == expected, f"Expected cycled colors {expected}, but got {plotted}"
+    plt.close('all')
+
+    with pytest.raises(ValueError):
+        plot_fragmentation_output(protein, [], color_mode='invalid')
+    plt.close('all')
+
+def test_plot_fragmentation_output_rasterize(tmp_path):
+    """
+    Test that domains and fragments are only rasterized when requested, and that
+    rasterized figures can be saved in a vector format
+    """
+    protein = Protein("TestProtein", "accession", "sequence", first_res=1, last_res=300, domain_list=[Domain("1", 1, 100, 'AF')])
+    fig = plot_fragmentation_output(protein, [(50, 150)])
+    assert not any(collection.get_rasterized() for collection in fig.axes[0].collections), "Collections should not be rasterized by default"
+
+    fig = plot_fragmentation_output(protein, [(50, 150)], rasterize=True)
+    assert all(collection.get_rasterized() for collection in fig.axes[0].collections), "Collections should be rasterized when requested"
+    fig.savefig(tmp_path / "rasterized.pdf")
+    assert (tmp_path / "rasterized.pdf").stat().st_size > 0, "Rasterized figure should be saved as a PDF"
+    plt.close('all')
+
+def test_dense_domains_downsampled():
+    """
+    Test that when there are more domains than pixels across the plot, domains of
+    the same type within the same pixel column are drawn as a single rectangle
+    """
+    # 100 pixels wide, with 2 AF then 3 UniProt domains in each 10 residue pixel column
+    domain_list = [Domain(identifier=str(i), start=i * 2, end=i * 2 + 1,
+                          domain_type='AF' if i % 5 < 2 else 'UniProt') for i in range(500)]
+    protein = Protein("DenseProtein", "accession", "sequence", first_res=0, last_res=999, domain_list=domain_list)
+    fig = plot_fragmentation_output(protein, [], figsize=(1, 1))
+    ax = fig.axes[0]
+    assert fig.dpi == 100, "Test assumes a figure dpi of 100"
+
+    drawn = ax.collections[0].get_paths()
+    assert len(drawn) == 200, f"Expected 200 merged domains (2 types in each of 100 columns), but got {len(drawn)}"
+    # First merged AF domain spans residues 0 to 3, offset by 0.5 for 1-based plotting
+    xs = drawn[0].vertices[:, 0]
+    assert (xs.min(), xs.max()) == (0.5, 4.5), f"Expected first merged domain to span 0.5 to 4.5, but got {xs.min()} to {xs.max()}"
 
 def test_overlapping_domains():
     """
@@ -229,7 +389,7 @@ def test_overlapping_domains():
     protein = Protein('OverlappingProtein', 'accession', 'sequence', 1, 500, domain_list=domains, fragment_list=fragments)
 
     fig = plot_fragmentation_output(protein, fragments)
-    assert len(fig.axes[0].patches) == 3, "Expected 3 patches on the plot (2 domains + 1 fragment)"
+    assert count_patches(fig.axes[0]) == 3, "Expected 3 patches on the plot (2 domains + 1 fragment)"
 
 
 def test_visual_output():
@@ -5,7 +5,7 @@ from unittest.mock import patch
 import pytest
 import requests_mock
 from requests.exceptions import ConnectionError as RequestsConnectionError
-from alphafragment.uniprot_fetch import fetch_uniprot_info, find_uniprot_domains
+from alphafragment.uniprot_fetch import fetch_uniprot_info, fetch_uniprot_info_batch, find_uniprot_domains
 from alphafragment.classes import Protein, Domain
 
 @pytest.mark.parametrize("accession_id, mock_url, response, status_code, expected, exception", [
@@ -38,6 +38,71 @@ def test_fetch_uniprot_info(accession_id, mock_url, response, status_code, expec
         else:
             assert result == expected, f"Expected {expected}, but got {result}"
 
+def test_fetch_uniprot_info_batch():
+    """
+    Test that 'fetch_uniprot_info_batch' requests accession IDs in batches, skips
+    placeholder IDs, and maps returned entries back to the requested IDs
+    """
+    entries = {'P1': {'accession': 'P1', 'sequence': 'AAA'},
+               'P2': {'accession': 'P2', 'sequence': 'CCC'},
+               'P3': {'accession': 'P3', 'sequence': 'DDD'}}
+
+    def batch_response(request, context):
+        # Entries are only returned for known primary accessions
+        return [entries[accession] for accession in request.qs['accession'][0].upper().split(',')
+                if accession in entries]
+
+    with requests_mock.Mocker() as m:
+        m.get("https://www.ebi.ac.uk/proteins/api/features", json=batch_response)
+        result = fetch_uniprot_info_batch(['P1', 'NA', 'p2', '', 'P1', 'SECONDARY', 'P3'], batch_size=2)
+
+    assert m.call_count == 2, f"Expected 4 distinct valid IDs to be fetched in 2 batches of up to 2, but got {m.call_count} requests"
+    expected = {'P1': entries['P1'], 'p2': entries['P2'], 'P3': entries['P3']}
+    assert result == expected, f"Expected {expected}, but got {result}"
+
+def test_fetch_uniprot_info_batch_error():
+    """
+    Test that a failed batch request is reported and returns no entries
+    """
+    with requests_mock.Mocker() as m:
+        m.get("https://www.ebi.ac.uk/proteins/api/features", status_code=400)
+        result = fetch_uniprot_info_batch(['P1', 'P2'])
+    assert result == {}, f"Expected no entries when the batch request fails, but got {result}"
+
+def test_fetch_uniprot_info_cache(tmp_path):
+    """
+    Test that data fetched with a cache directory is read back from the cache
+    rather than fetched again, and that failed fetches are not cached
+    """
+    with requests_mock.Mocker() as m:
+        m.get("https://www.ebi.ac.uk/proteins/api/features/P12345", json={'features': []})
+        m.get("https://www.ebi.ac.uk/proteins/api/features/INVALID", status_code=404)
+        first = fetch_uniprot_info("P12345", cache_dir=tmp_path)
+        second = fetch_uniprot_info("P12345", cache_dir=tmp_path)
+        fetch_uniprot_info("INVALID", cache_dir=tmp_path)
+        fetch_uniprot_info("INVALID", cache_dir=tmp_path)
+
+    assert first == second == {'features': []}, f"Expected cached data to match fetched data, but got {first} and {second}"
+    assert m.call_count == 3, f"Expected 1 request for the cached ID and 2 for the failed ID, but got {m.call_count} requests"
+    assert [path.name for path in tmp_path.iterdir()] == ["P12345.json"], "Expected only the successful fetch to be cached"
+
+def test_fetch_uniprot_info_batch_cache(tmp_path):
+    """
+    Test that 'fetch_uniprot_info_batch' only requests accession IDs that are
+    not already cached
+    """
+    with requests_mock.Mocker() as m:
+        m.get("https://www.ebi.ac.uk/proteins/api/features/P1", json={'accession': 'P1', 'sequence': 'AAA'})
+        m.get("https://www.ebi.ac.uk/proteins/api/features", json=[{'accession': 'P2', 'sequence': 'CCC'}])
+        fetch_uniprot_info("P1", cache_dir=tmp_path)
+        result = fetch_uniprot_info_batch(['P1', 'P2'], cache_dir=tmp_path)
+        batch_query = m.request_history[-1].qs['accession']
+
+    expected = {'P1': {'accession': 'P1', 'sequence': 'AAA'}, 'P2': {'accession': 'P2', 'sequence': 'CCC'}}
+    assert result == expected, f"Expected {expected}, but got {result}"
+    assert batch_query == ['p2'], f"Expected only the uncached ID to be requested, but got {batch_query}"
+    assert (tmp_path / "P2.json").exists(), "Expected batch results to be cached"
+
 @pytest.mark.parametrize("accession_id, uniprot_data, expected_domains, expected_output", [
     # No data available
     ("P12345", None, None, None),